@@ -4,10 +4,18 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import os
+from uidai_ranking import load_rank_index, district_rank
+from uidai_hierarchy import load_rollup, region_of, ROLLUP_FILE
+from uidai_store import (load_district_table, add_dashboard_features, open_monthly_store, monthly_slice,
+                         artifact_version, HotReloader, APP_COLUMNS, DISTRICT_CSV, DISTRICT_ARROW,
+                         MONTHLY_CSV, MONTHLY_ARROW)
+# Admin-only analytics (capacity, allocation, comparison, query, export) are imported
+# where they are used, so the first (citizen) view starts without scipy or pyarrow.parquet
+
+WEEKDAY_FILE = 'aadhaar_weekday_profiles.csv'   # Written by uidai.py; run the pipeline before the app
+PEERS_FILE = 'aadhaar_district_peers.csv'
+RANK_FILE = 'aadhaar_rank_index.npz'
 
 # ==========================================
 # 1. APP CONFIGURATION & STYLING
@@ -65,44 +73,134 @@ st.markdown("""
 # ==========================================
 # 2. DATA ENGINE
 # ==========================================
-@st.cache_data
-def load_and_process_data():
-    try:
-        # Robust file path handling
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(current_dir, 'aadhaar_district_analytics_final_cleaned.csv')
-        df = pd.read_csv(file_path)
-    except FileNotFoundError:
-        st.error("⚠️ Data file not found. Please ensure 'aadhaar_district_analytics_final_cleaned.csv' is in the app directory.")
-        return pd.DataFrame()
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))  # Robust file path handling
+
+def read_district_data():
+    # Memory-mapped Arrow copy if present, else the CSV
+    df = load_district_table(DATA_DIR, APP_COLUMNS)
 
     # --- Feature Engineering ---
-    # 1. Intensity Metrics
-    if 'bio_age_5_17' in df.columns and 'demo_age_5_17' in df.columns:
-        df['Child_Bio_Intensity'] = df['bio_age_5_17'] / (df['demo_age_5_17'] + 1)
-    
-    if 'bio_age_17_' in df.columns and 'demo_age_17_' in df.columns:
-        df['Adult_Bio_Intensity'] = df['bio_age_17_'] / (df['demo_age_17_'] + 1)
+    # Intensities, scores and clusters are precomputed by the pipeline; only an older
+    # artifact without them is completed here
+    if 'Digital_Maturity' not in df.columns:
+        df = add_dashboard_features(df)
+    # Regions from the single hierarchy definition (older artifacts used a partial map)
+    df['Region'] = region_of(df['state'])
 
-    # 2. Clustering (ML)
     features = ['UER_Score', 'Catch_Up_Index', 'Adult_Entry_Rate', 'CV_Volatility']
-    available_features = [f for f in features if f in df.columns]
-    
-    if len(available_features) == 4:
-        X = df[available_features].fillna(0).replace([np.inf, -np.inf], 0)
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        kmeans = KMeans(n_clusters=4, random_state=42)
-        df['Cluster_ID'] = kmeans.fit_predict(X_scaled)
-    else:
-        df['Cluster_ID'] = 0
-        
+    if 'Cluster_ID' not in df.columns:
+        if all(f in df.columns for f in features):
+            from sklearn.cluster import KMeans
+            from sklearn.preprocessing import StandardScaler
+            X = df[features].fillna(0).replace([np.inf, -np.inf], 0)
+            X_scaled = StandardScaler().fit_transform(X)
+            df['Cluster_ID'] = KMeans(n_clusters=4, random_state=42).fit_predict(X_scaled)
+        else:
+            df['Cluster_ID'] = 0
+
     return df
 
-df = load_and_process_data()
+# cache_resource: one reloader per server process. Sessions share its current
+# (version, frame) snapshot, which is read-only; when the pipeline rewrites the
+# artifact, the new version loads in the background and is swapped in whole.
+@st.cache_resource
+def district_data_source():
+    return HotReloader(read_district_data, lambda: artifact_version(DATA_DIR, [DISTRICT_ARROW, DISTRICT_CSV]))
+
+def load_and_process_data():
+    try:
+        return district_data_source().get()
+    except FileNotFoundError:
+        st.error(f"⚠️ Data file not found. Please ensure '{DISTRICT_CSV}' is in the app directory.")
+        return None, pd.DataFrame()
+
+# Caches derived from the frame are keyed on its data version (the frame itself is not hashed)
+@st.cache_resource(max_entries=2)
+def build_district_lookups(_df, data_version):
+    # Built once per data version: state -> sorted districts, (state, district) -> row position
+    states = sorted(_df['state'].unique())
+    state_districts = {s: sorted(g) for s, g in _df.groupby('state')['district'].unique().items()}
+    row_pos = {key: i for i, key in enumerate(zip(_df['state'], _df['district']))}
+    return states, state_districts, row_pos
+
+@st.cache_resource(max_entries=2)
+def load_query_index(_df, data_version):
+    # Sorted numeric indexes + per-value bitmaps, shared by every session
+    from uidai_query import build_query_index
+    return build_query_index(_df)
+
+# Smaller artifacts: cached per file version, reloaded when the pipeline rewrites them
+@st.cache_resource(max_entries=1)
+def load_monthly_store(version):
+    # Memory-mapped, district-indexed monthly store; slices are read on demand
+    return open_monthly_store(DATA_DIR)
+
+@st.cache_data(max_entries=1)
+def load_weekday_profiles(version):
+    # Precomputed by the pipeline: 7 rows per district (Mon..Sun), sorted by state/district
+    file_path = os.path.join(DATA_DIR, WEEKDAY_FILE)
+    if not os.path.exists(file_path):
+        return pd.DataFrame(), {}
+    profiles = pd.read_csv(file_path)
+    # (state, district) -> first row of that district's week
+    starts = profiles.iloc[::7]
+    profile_index = {key: i * 7 for i, key in enumerate(zip(starts['state'], starts['district']))}
+    return profiles, profile_index
+
+@st.cache_data(max_entries=1)
+def load_district_peers(version):
+    # Precomputed by the pipeline: k rows per district, sorted by state/district/rank
+    file_path = os.path.join(DATA_DIR, PEERS_FILE)
+    if not os.path.exists(file_path):
+        return pd.DataFrame(), {}
+    peers = pd.read_csv(file_path)
+    # (state, district) -> (first row, last row + 1)
+    sizes = peers.groupby(['state', 'district'], sort=False).size()
+    peer_index = {key: (end - n, end) for key, n, end in zip(sizes.index, sizes, sizes.cumsum())}
+    return peers, peer_index
+
+@st.cache_data(max_entries=1)
+def load_district_ranks(version):
+    # Precomputed by the pipeline: rank/percentile arrays per district and metric
+    ranks = load_rank_index(os.path.join(DATA_DIR, RANK_FILE))
+    if ranks is None:
+        return None, {}
+    # (state, district) -> row position in the rank arrays
+    rank_pos = {key: i for i, key in enumerate(zip(ranks['state'], ranks['district']))}
+    return ranks, rank_pos
+
+@st.cache_data(max_entries=1)
+def load_rollup_table(version):
+    # Precomputed by the pipeline: summed counts and ratios per district/state/region/nation
+    rollup = load_rollup(os.path.join(DATA_DIR, ROLLUP_FILE))
+    if rollup is None:
+        return None, {}
+    # (level, name) -> row position of the state, region and nation ('') rows
+    upper = np.flatnonzero(rollup['Level'].to_numpy() != 'district')
+    rows = rollup.iloc[upper]
+    names = rows['state'].where(rows['Level'] == 'state', rows['Region'])
+    rollup_pos = dict(zip(zip(rows['Level'], names), upper.tolist()))
+    return rollup, rollup_pos
+
+@st.cache_data(show_spinner="Solving national allocation...")
+def solve_allocation(_df, data_version, days, budget, cross_state, state_caps=()):
+    # state_caps: ((state, lakh), ...), a tuple so the scenario is hashable for the cache
+    from uidai_allocation import optimize_allocation
+    return optimize_allocation(_df, days, budget=budget, cross_state=cross_state,
+                               state_budget=dict(state_caps) or None)
+
+data_version, df = load_and_process_data()
+weekday_profiles, profile_index = load_weekday_profiles(artifact_version(DATA_DIR, [WEEKDAY_FILE]))
+district_peers, peer_index = load_district_peers(artifact_version(DATA_DIR, [PEERS_FILE]))
+district_ranks, rank_pos = load_district_ranks(artifact_version(DATA_DIR, [RANK_FILE]))
+rollup, rollup_pos = load_rollup_table(artifact_version(DATA_DIR, [ROLLUP_FILE]))
+monthly_source, monthly_ranges = load_monthly_store(artifact_version(DATA_DIR, [MONTHLY_ARROW, MONTHLY_CSV]))
+# Days of history behind the district totals (sum of weekday counts in any one profile)
+history_days = int(weekday_profiles['Weeks'].iloc[:7].sum()) if not weekday_profiles.empty else 365
 
 if df.empty:
     st.stop()
+state_list, state_districts, row_pos = build_district_lookups(df, data_version)
 
 # ==========================================
 # 3. SIDEBAR NAVIGATION
@@ -119,12 +217,12 @@ with st.sidebar:
     st.markdown("### 📍 Location Filter")
     
     # Cascade Filters
-    selected_state = st.selectbox("Select State", sorted(df['state'].unique()))
-    district_list = sorted(df[df['state'] == selected_state]['district'].unique())
+    selected_state = st.selectbox("Select State", state_list)
+    district_list = state_districts[selected_state]
     selected_district = st.selectbox("Select District", district_list)
     
     # Specific Data Row
-    row = df[(df['state'] == selected_state) & (df['district'] == selected_district)].iloc[0]
+    row = df.iloc[row_pos[(selected_state, selected_district)]]
 
 # ==========================================
 # 4. VIEW: CITIZEN UTILITY
@@ -147,27 +245,43 @@ if user_role == "👤 Citizen Utility":
         else:
             st.error("🛑 **Irregular Service:** Centers likely operating on Camp Mode. Check local news.")
 
-        # --- Interactive Crowd Chart (FIXED) ---
+        # --- Interactive Crowd Chart (Real Weekday Load) ---
         st.subheader("⏳ Predicted Wait Times")
         
-        # FIX: Generate unique data for each district using a hash of the name
-        # This ensures every district looks different!
-        np.random.seed(hash(selected_district) % 2**32) 
-        
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        # Generate random traffic numbers between 20 and 100 for weekdays, lower for weekends
-        traffic = [np.random.randint(50, 100) for _ in range(5)] + [np.random.randint(10, 40), 0]
-        
-        fig = px.bar(
-            x=days, y=traffic, 
-            labels={'x': 'Day', 'y': 'Busy Level (%)'},
-            color=traffic,
-            color_continuous_scale=['#22c55e', '#facc15', '#ef4444'], # Green -> Yellow -> Red
-            height=250,
-            title=f"Traffic Pattern for {selected_district}"
-        )
-        fig.update_layout(showlegend=False, margin=dict(l=0, r=0, t=30, b=0))
-        st.plotly_chart(fig, use_container_width=True)
+        start = profile_index.get((selected_state, selected_district))
+        if start is None:
+            st.info("Weekly load profile not available for this district yet." if not weekday_profiles.empty else
+                    f"Weekly load profiles not generated yet: run `python uidai.py` to create {WEEKDAY_FILE}.")
+        else:
+            week = weekday_profiles.iloc[start:start + 7]
+            days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+            # Average daily transactions, relative to this district's busiest day
+            peak = week['Avg_Daily_Volume'].max()
+            traffic = (week['Avg_Daily_Volume'] / peak * 100).round().to_numpy() if peak > 0 else np.zeros(7)
+            
+            fig = px.bar(
+                x=days, y=traffic, 
+                labels={'x': 'Day', 'y': 'Busy Level (%)'},
+                color=traffic,
+                color_continuous_scale=['#22c55e', '#facc15', '#ef4444'], # Green -> Yellow -> Red
+                height=250,
+                title=f"Traffic Pattern for {selected_district}"
+            )
+            fig.update_layout(showlegend=False, margin=dict(l=0, r=0, t=30, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Who is in the queue on each day (children vs adults)
+            split = pd.DataFrame({
+                'Day': days * 2,
+                'Group': ['Children (0-17)'] * 7 + ['Adults (18+)'] * 7,
+                'Avg Daily Visits': np.concatenate([
+                    (week[['Enrol_0_5', 'Enrol_5_17', 'Demo_5_17', 'Bio_5_17']].sum(axis=1) / week['Weeks'].clip(lower=1)).to_numpy(),
+                    (week[['Enrol_18_plus', 'Demo_17_plus', 'Bio_17_plus']].sum(axis=1) / week['Weeks'].clip(lower=1)).to_numpy()
+                ])
+            })
+            fig = px.bar(split, x='Day', y='Avg Daily Visits', color='Group', height=250, title="Visitors by Age Group")
+            fig.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+            st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         # --- Action Card ---
@@ -186,16 +300,8 @@ if user_role == "👤 Citizen Utility":
         
         # --- Digital Score (FIXED) ---
         with st.container(border=True):
-            # Calculate Digital Maturity as % of Demographic Updates vs Total Updates
-            # This ensures the score is always between 0 and 100
-            demo_total = row.get('demo_age_5_17', 0) + row.get('demo_age_17_', 0)
-            bio_total = row.get('bio_age_5_17', 0) + row.get('bio_age_17_', 0)
-            total_updates = demo_total + bio_total
-            
-            if total_updates > 0:
-                digital_score = (demo_total / total_updates) * 100
-            else:
-                digital_score = 0
+            # Digital Maturity: % of Demographic Updates vs Total Updates (always 0-100)
+            digital_score = row.get('Digital_Maturity', 0)
             
             st.metric("Digital Maturity Score", f"{digital_score:.0f}/100", help="Percentage of residents using Digital Demographic Updates vs Physical Biometric Updates.")
             
@@ -245,26 +351,97 @@ else:
     k3.metric("Adult Entry Rate", f"{row.get('Adult_Entry_Rate', 0)*100:.1f}%", delta="Suspicious" if row.get('Adult_Entry_Rate', 0) > 0.05 else "Stable", delta_color="inverse")
     k4.metric("Bio Failure Proxy", f"{row.get('Adult_Bio_Intensity', 0):.2f}", help="High value indicates fingerprint failures.")
 
+    # Rank badges (1 = highest), read from the precomputed ranking index
+    pos = rank_pos.get((selected_state, selected_district))
+    if pos is not None:
+        kpi_metrics = ['UER_Score', 'Catch_Up_Index', 'Adult_Entry_Rate', 'R22_Adult_Bio_Intensity']
+        for col, metric in zip([k1, k2, k3, k4], kpi_metrics):
+            if metric in district_ranks['metrics']:
+                r = district_rank(district_ranks, pos, metric)
+                col.caption(f"#{r['State_Rank']} of {r['State_Count']} in state · "
+                            f"#{r['National_Rank']} of {r['National_Count']} nationally "
+                            f"({r['National_Pct']:.0f}th pct)")
+
+    # State / region / national benchmarks, read straight from the rollup
+    state_pos = rollup_pos.get(('state', selected_state))
+    if state_pos is not None:
+        with st.expander("🧭 State, Region & National Benchmarks"):
+            state_row = rollup.iloc[state_pos]
+            levels = [(selected_district, row), (selected_state, state_row),
+                      (f"{state_row['Region']} Region", rollup.iloc[rollup_pos[('region', state_row['Region'])]]),
+                      ("India", rollup.iloc[rollup_pos[('nation', '')]])]
+            st.dataframe(pd.DataFrame({
+                'Level': [name for name, _ in levels],
+                'Total Volume': [int(r.get('Grand_Total', 0)) for _, r in levels],
+                'UER': [round(r.get('UER_Score', 0), 2) for _, r in levels],
+                'Catch-up': [round(r.get('Catch_Up_Index', 0), 2) for _, r in levels],
+                'Adult Entry %': [round(r.get('Adult_Entry_Rate', 0) * 100, 1) for _, r in levels],
+                'Adult Bio Intensity': [round(r.get('R22_Adult_Bio_Intensity', r.get('Adult_Bio_Intensity', 0)), 2)
+                                        for _, r in levels],
+            }), hide_index=True, use_container_width=True)
+
     st.markdown("---")
 
     # --- COMPARISON MODE TOGGLE ---
     compare_mode = st.toggle("🔄 Enable District Comparison Mode")
     
     if compare_mode:
+        from uidai_compare import compare_districts
         st.markdown("### ⚔️ District Comparison")
-        comp_district = st.selectbox("Select District to Compare", [d for d in district_list if d != selected_district])
-        row_comp = df[(df['state'] == selected_state) & (df['district'] == comp_district)].iloc[0]
-        
-        c1, c2, c3 = st.columns(3)
-        c1.metric("Total Volume", f"{row['Grand_Total']:,}", delta=f"{row['Grand_Total'] - row_comp['Grand_Total']:,}")
-        c2.metric("Enrolment Total", f"{row['Enrol_Total']:,}", delta=f"{row['Enrol_Total'] - row_comp['Enrol_Total']:,}")
-        c3.metric("Update Total", f"{row['Update_Total']:,}", delta=f"{row['Update_Total'] - row_comp['Update_Total']:,}")
+        # Any districts nationwide (defaults to the nearest peers), plus this state's median
+        this_key = (selected_state, selected_district)
+        span = peer_index.get(this_key)
+        peer_keys = [] if span is None else list(zip(district_peers['Peer_State'].iloc[span[0]:span[1]],
+                                                     district_peers['Peer_District'].iloc[span[0]:span[1]]))
+        others = st.multiselect("Compare With", [k for k in row_pos if k != this_key],
+                                default=[k for k in peer_keys if k in row_pos][:3], max_selections=8,
+                                format_func=lambda k: f"{k[1]} ({k[0]})")
+        comparison = compare_districts(df, [row_pos[this_key]] + [row_pos[k] for k in others])
+
+        fig = px.bar(comparison, x='District', y='Value', color='District', facet_col='Metric',
+                     facet_col_wrap=4, facet_row_spacing=0.12, height=520,
+                     hover_data={'Delta': ':,.2f', 'Pct_Diff': ':.1f', 'State_Pctile': ':.0f'})
+        fig.update_yaxes(matches=None, showticklabels=True)
+        fig.update_xaxes(showticklabels=False, title=None)
+        fig.for_each_annotation(lambda a: a.update(text=a.text.split('=')[-1]))
+        fig.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.caption(f"% difference vs {selected_district}, and percentile within own state (in brackets)")
+        pct = comparison.pivot(index='District', columns='Metric', values='Pct_Diff')
+        rank = comparison.pivot(index='District', columns='Metric', values='State_Pctile')
+        table = pct.round(1).astype(str) + '% (' + rank.round(0).astype(int).astype(str) + ')'
+        st.dataframe(table.loc[comparison['District'].unique(), comparison['Metric'].unique()],
+                     use_container_width=True)
         st.markdown("---")
 
+    # --- PEER DISTRICTS (precomputed nearest neighbours, nationwide) ---
+    with st.expander("👥 Districts Like This One"):
+        span = peer_index.get((selected_state, selected_district))
+        if span is None:
+            st.caption("Peer index not available for this district yet.")
+        else:
+            peers = district_peers.iloc[span[0]:span[1]]
+            # Row positions; peers missing from this table (-1) come back as empty rows
+            peer_rows = df.reindex([row_pos.get(key, -1) for key in zip(peers['Peer_State'], peers['Peer_District'])])
+            peer_table = pd.DataFrame({
+                'District': peers['Peer_District'].to_numpy(),
+                'State': peers['Peer_State'].to_numpy(),
+                'Similarity Distance': peers['Distance'].round(2).to_numpy(),
+                'UER': peer_rows['UER_Score'].round(2).to_numpy(),
+                'Catch-up': peer_rows['Catch_Up_Index'].round(2).to_numpy(),
+                'Adult Entry %': (peer_rows['Adult_Entry_Rate'] * 100).round(1).to_numpy(),
+                'Cluster': peer_rows['Cluster_ID'].to_numpy()
+            })
+            st.dataframe(peer_table, hide_index=True, use_container_width=True)
+
     # --- ANALYTICS TABS ---
-    tab1, tab2, tab3 = st.tabs(["📊 Resource Planning", "📉 Demographics", "🔍 Fraud & Anomalies"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Resource Planning", "📉 Demographics", "🔍 Fraud & Anomalies",
+                                            "📈 Trends", "🔎 District Query"])
 
     with tab1:
+        from uidai_capacity import demand_from_profiles, baseline_kits, district_totals, estimate_wait_times, OPEN_HOURS
+        from uidai_allocation import KIT_COST, MOVE_COST
         st.subheader("Resource Allocation Strategy")
         c1, c2 = st.columns(2)
         
@@ -292,6 +469,87 @@ else:
                 st.write("• Deploy more GPS-enabled Enrolment Kits.")
                 st.write("• Schedule camps in schools.")
 
+        # --- Capacity What-If (M/M/c queue on this district's weekday demand) ---
+        st.markdown("#### ⏱️ Center Capacity What-If")
+        start = profile_index.get((selected_state, selected_district))
+        if start is None:
+            st.caption("Weekly load profile not available for this district yet." if not weekday_profiles.empty else
+                       f"Weekly load profiles not generated yet: run `python uidai.py` to create {WEEKDAY_FILE}.")
+        else:
+            demand = {k: v[None, :] for k, v in demand_from_profiles(weekday_profiles.iloc[start:start + 7]).items()}
+            # Same assumed inventory as the redeployment planner below (its Kits_Now columns)
+            baseline = baseline_kits(df['state'], district_totals(df), history_days)
+            base_kits = max(int(sum(k[row_pos[(selected_state, selected_district)]] for k in baseline.values())), 1)
+            kits = st.slider("Operating Kits / Operators", 1, max(base_kits * 3, 10), base_kits,
+                             help="Biometric updates take twice as long as demographic ones.")
+            result = estimate_wait_times(demand, np.array([kits]))
+            wait = result['wait_minutes'][0]
+            overloaded = ~np.isfinite(wait)
+            
+            w1, w2, w3 = st.columns(3)
+            w1.metric("Avg Wait (open days)", f"{np.mean(wait[~overloaded]):.0f} min" if (~overloaded).any() else "—")
+            w2.metric("Peak Utilization", f"{min(np.max(result['utilization'][0]), 1) * 100:.0f}%")
+            w3.metric("Overloaded Days", f"{int(overloaded.sum())} / 7", delta_color="inverse",
+                      delta="Add kits" if overloaded.any() else "OK")
+            
+            wait_df = pd.DataFrame({
+                'Day': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+                'Wait (min)': np.where(overloaded, OPEN_HOURS * 60, wait),
+                'Status': np.where(overloaded, 'Overloaded', 'Within Capacity')
+            })
+            fig = px.bar(wait_df, x='Day', y='Wait (min)', color='Status', height=250,
+                         color_discrete_map={'Within Capacity': '#22c55e', 'Overloaded': '#ef4444'},
+                         title=f"Expected Wait with {kits} Kits")
+            fig.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+
+        # --- National Redeployment Planner (sparse MILP over all districts) ---
+        with st.expander("🗺️ National Kit Redeployment Planner"):
+            p1, p2 = st.columns(2)
+            budget = p1.number_input("Budget (Rs. lakh)", min_value=0.0, value=50.0, step=10.0,
+                                     help=f"New ECMP kit: {KIT_COST['Enrol']} lakh, UCL laptop: {KIT_COST['Update']} lakh. "
+                                          f"Moving a kit: {MOVE_COST['Enrol']} / {MOVE_COST['Update']} lakh.")
+            cross_state = p2.toggle("Allow moves across states", value=False)
+            caps = st.data_editor(pd.DataFrame({'State': pd.Series(dtype=str), 'Cap (Rs. lakh)': pd.Series(dtype=float)}),
+                                  num_rows="dynamic", hide_index=True, use_container_width=True, key="alloc_caps",
+                                  column_config={
+                                      'State': st.column_config.SelectboxColumn(options=state_list, required=True),
+                                      'Cap (Rs. lakh)': st.column_config.NumberColumn(min_value=0.0, step=5.0, required=True),
+                                  })
+            st.caption("Optional per-state spending caps (purchases and moves into the state); "
+                       "states not listed are limited by the national budget only.")
+            state_caps = tuple(sorted((str(r['State']), float(r['Cap (Rs. lakh)']))
+                                      for _, r in caps.dropna().drop_duplicates('State', keep='last').iterrows()))
+            
+            if st.button("▶️ Solve Scenario"):
+                plan, summary = solve_allocation(df, data_version, history_days, budget, cross_state, state_caps)
+                s1, s2, s3 = st.columns(3)
+                s1.metric("Spend", f"Rs. {summary['Spend']:.1f} lakh")
+                s2.metric("Unserved Enrolments / day", f"{summary['Enrol_Unserved_Plan']:,.0f}",
+                          delta=f"{summary['Enrol_Unserved_Plan'] - summary['Enrol_Unserved_Now']:,.0f}", delta_color="inverse")
+                s3.metric("Unserved Updates / day", f"{summary['Update_Unserved_Plan']:,.0f}",
+                          delta=f"{summary['Update_Unserved_Plan'] - summary['Update_Unserved_Now']:,.0f}", delta_color="inverse")
+                st.caption(f"Solved in {summary['solve_seconds']:.1f}s · {summary['status']}")
+                if not summary['optimal']:
+                    st.warning(f"Solver stopped at its {summary['time_limit']:.0f}s time limit: this plan is within "
+                               f"{summary['mip_gap']:.1%} of the best possible, not proven optimal.")
+                if summary['cross_state_skipped']:
+                    st.info("Moving kits within states already serves all demand; no cross-state moves needed.")
+                elif summary['kept_within_state']:
+                    st.info("Moving kits across states found no better plan than moving them within states.")
+                
+                if state_caps:
+                    spent = plan.assign(Spend=sum(plan[f'{kit}_Buy'] * KIT_COST[kit] + plan[f'{kit}_Move'].clip(lower=0) * MOVE_COST[kit]
+                                                  for kit in KIT_COST)).groupby('state')['Spend'].sum()
+                    st.dataframe(pd.DataFrame({'State': [c[0] for c in state_caps],
+                                               'Cap (Rs. lakh)': [c[1] for c in state_caps],
+                                               'Spent (Rs. lakh)': spent.reindex([c[0] for c in state_caps]).fillna(0).round(2).to_numpy()}),
+                                 hide_index=True, use_container_width=True)
+                state_plan = plan[plan['state'] == selected_state]
+                changed = state_plan[(state_plan[['Enrol_Buy', 'Enrol_Move', 'Update_Buy', 'Update_Move']] != 0).any(axis=1)]
+                st.write(f"**{selected_state}:** {len(changed)} districts change")
+                st.dataframe(changed.drop(columns=['state']), hide_index=True, use_container_width=True)
+
     with tab2:
         st.subheader("Population Dynamics")
         c1, c2 = st.columns([2, 1])
@@ -317,10 +575,8 @@ else:
     with tab3:
         st.subheader("Fraud Detection Radar")
         
-        # Ghost Village Logic
-        enrol_tot = row.get('Enrol_Total', 0)
-        update_tot = row.get('Update_Total', 0)
-        ghost_proxy = enrol_tot / (update_tot + 1)
+        # Ghost Village Logic (enrolments per update, precomputed)
+        ghost_proxy = row.get('Ghost_Proxy', 0)
         
         c1, c2, c3 = st.columns(3)
         
@@ -342,3 +598,122 @@ else:
             st.metric("Operator Error Rate", f"{row.get('Correction_Intensity', 0):.2f}")
             if row.get('Correction_Intensity', 0) > 5.0:
                 st.error("🚨 High demographic corrections. Audit operators.")
+
+    with tab4:
+        st.subheader("Monthly Trends")
+        monthly = monthly_slice(monthly_source, monthly_ranges, selected_state, selected_district)
+        if monthly.empty:
+            st.info("No monthly history available for this district.")
+        else:
+            enrol_m = monthly[['Enrol_age_0_5', 'Enrol_age_5_17', 'Enrol_age_18_greater']].sum(axis=1)
+            demo_m = monthly[['Demo_demo_age_5_17', 'Demo_demo_age_17_']].sum(axis=1)
+            bio_m = monthly[['Bio_bio_age_5_17', 'Bio_bio_age_17_']].sum(axis=1)
+
+            volume_df = pd.DataFrame({'Month': monthly['YearMonth'], 'Enrolments': enrol_m,
+                                      'Demographic Updates': demo_m, 'Biometric Updates': bio_m})
+            fig = px.line(volume_df.melt(id_vars='Month', var_name='Series', value_name='Transactions'),
+                          x='Month', y='Transactions', color='Series', markers=True, height=300,
+                          title="Monthly Volume")
+            fig.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Same ratio definitions as the district metrics, month by month
+            ratio_df = pd.DataFrame({
+                'Month': monthly['YearMonth'],
+                'UER Score': (demo_m + bio_m) / (enrol_m + 1),
+                'Catch-up Index': monthly['Enrol_age_5_17'] / (monthly['Enrol_age_0_5'] + 1),
+                'Adult Entry Rate': monthly['Enrol_age_18_greater'] / (enrol_m + 1),
+                'Child Bio Intensity': monthly['Bio_bio_age_5_17'] / (monthly['Demo_demo_age_5_17'] + 1),
+                'Adult Bio Intensity': monthly['Bio_bio_age_17_'] / (monthly['Demo_demo_age_17_'] + 1),
+            })
+            ratios = st.multiselect("Ratios", list(ratio_df.columns[1:]), default=['UER Score', 'Catch-up Index'])
+            if ratios:
+                fig = px.line(ratio_df.melt(id_vars='Month', value_vars=ratios, var_name='Ratio'),
+                              x='Month', y='value', color='Ratio', markers=True, height=300,
+                              title="Monthly Ratios")
+                fig.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                st.plotly_chart(fig, use_container_width=True)
+
+    with tab5:
+        from uidai_query import run_query, query_page, QUERY_CATEGORIES, QUERY_OPS
+        from uidai_export import export_buffer, export_rows, export_formats, EXPORT_FORMATS, EXPORT_STREAM_ROWS
+        query_index = load_query_index(df, data_version)
+        st.subheader("Cross-District Query")
+        st.caption("All filters are combined (AND); several values within one filter match any of them.")
+
+        # Categorical filters (bitmap per value)
+        cat_cols = [c for c in QUERY_CATEGORIES if c in query_index['bitmaps']]
+        categories = {}
+        for col, box in zip(cat_cols, st.columns(len(cat_cols))):
+            label = {'state': 'State', 'Cluster_ID': 'Cluster'}.get(col, col.replace('_', ' '))
+            categories[col] = box.multiselect(label, list(query_index['bitmaps'][col]), key=f"q_{col}")
+
+        # Numeric conditions (sorted index range)
+        numeric_cols = [c for c in ['UER_Score', 'Catch_Up_Index', 'Adult_Entry_Rate', 'CV_Volatility',
+                                    'Grand_Total', 'Enrol_Total', 'Update_Total',
+                                    'Child_Bio_Intensity', 'Adult_Bio_Intensity'] if c in query_index['sorted']]
+        conditions = []
+        for i in range(3):
+            q1, q2, q3 = st.columns([2, 1, 2])
+            col = q1.selectbox("Metric", ["—"] + numeric_cols, key=f"q_metric_{i}", label_visibility="collapsed")
+            op = q2.selectbox("Operator", QUERY_OPS, key=f"q_op_{i}", label_visibility="collapsed")
+            if op == 'between':
+                lo = q3.number_input("From", value=0.0, key=f"q_lo_{i}", label_visibility="collapsed")
+                hi = q3.number_input("To", value=1.0, key=f"q_hi_{i}", label_visibility="collapsed")
+                value = (lo, hi)
+            else:
+                value = q3.number_input("Value", value=0.0, key=f"q_val_{i}", label_visibility="collapsed",
+                                        help="Adult_Entry_Rate is a fraction (0.05 = 5%).")
+            if col != "—":
+                conditions.append((col, op, value))
+
+        hits = run_query(query_index, conditions, categories)
+
+        r1, r2, r3, r4 = st.columns(4)
+        sort_by = r1.selectbox("Sort by", numeric_cols + ['state', 'district'], key="q_sort")
+        ascending = r2.toggle("Ascending", value=False, key="q_asc")
+        page_size = r3.selectbox("Rows per page", [25, 50, 100], key="q_page_size")
+        n_pages = max(-(-len(hits) // page_size), 1)
+        page = r4.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, key="q_page")
+
+        result_cols = ['district', 'state'] + cat_cols[1:] + numeric_cols
+        results, total, n_pages = query_page(df, query_index, hits, sort_by, ascending, page, page_size, result_cols)
+        st.write(f"**{total:,}** of {query_index['n']:,} districts match")
+        st.dataframe(results, hide_index=True, use_container_width=True)
+
+        # --- Bulk export (small: built on click into memory; large: streamed by the API server) ---
+        st.markdown("#### 📦 Bulk Export")
+        e1, e2, e3 = st.columns(3)
+        scope = e1.radio("Districts", ["Query results", f"All of {selected_state}"], key="x_scope")
+        fmt = e2.selectbox("Format", export_formats(), key="x_format")
+        content = e3.radio("Contents", ["District summary", "Monthly series"], key="x_content",
+                           disabled=EXPORT_FORMATS[fmt][0] == 'zip',
+                           help="The zip bundle always contains both.")
+        content = 'monthly' if content == "Monthly series" else 'districts'
+        if scope == "Query results":
+            export_pos, export_name = hits, "Query"
+            keys = zip(df['state'].to_numpy()[hits], df['district'].to_numpy()[hits])
+            selection = [] if len(hits) == len(df) else [('district', f"{s}/{d}") for s, d in keys]
+        else:
+            export_pos = np.flatnonzero(df['state'].to_numpy() == selected_state)
+            export_name = selected_state.replace(' ', '_')
+            selection = [('state', selected_state)]
+        ext, mime = EXPORT_FORMATS[fmt]
+        rows = export_rows(df, export_pos, monthly_ranges, fmt, content)
+
+        if rows > EXPORT_STREAM_ROWS:
+            from urllib.parse import urlencode
+            from uidai_api import API_PORT, EXPORT_PATH
+            api_url = os.environ.get('UIDAI_API_URL', f"http://localhost:{API_PORT}")
+            st.link_button(f"📥 Export {len(export_pos):,} Districts ({rows:,} rows, streamed)",
+                           f"{api_url}{EXPORT_PATH}{ext}?{urlencode([('content', content)] + selection)}",
+                           disabled=len(export_pos) == 0)
+            st.caption("Large exports are streamed by the API server (`python uidai_api.py`), "
+                       "so the file is never held in memory.")
+        else:
+            def build_export(positions=export_pos, fmt=fmt, content=content):
+                return export_buffer(df, positions, monthly_source, monthly_ranges, fmt, content)
+
+            st.download_button(f"📥 Export {len(export_pos):,} Districts", data=build_export,
+                               file_name=f"Aadhaar_{export_name}.{ext}", mime=mime,
+                               disabled=len(export_pos) == 0)
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uidai_allocation import optimize_allocation, KIT_TYPES, KIT_COST, MOVE_COST
+
+N_STATES, N_DISTRICTS, DAYS = 36, 784, 120
+# "Solve nationally in seconds on a laptop": generous for slow CI boxes
+MAX_SECONDS = 15.0
+
+
+@pytest.fixture(scope='module')
+def national():
+    # A national-size district table with skewed (lognormal) volumes
+    rng = np.random.default_rng(7)
+    states = np.repeat([f'State {i:02d}' for i in range(N_STATES)], -(-N_DISTRICTS // N_STATES))[:N_DISTRICTS]
+    volume = lambda scale: np.round(rng.lognormal(np.log(scale), 0.9, N_DISTRICTS))
+    return pd.DataFrame({
+        'state': states,
+        'district': [f'District {i:03d}' for i in range(N_DISTRICTS)],
+        'Enrol_Total': volume(3000),
+        'demo_age_5_17': volume(4000), 'demo_age_17_': volume(12000),
+        'bio_age_5_17': volume(8000), 'bio_age_17_': volume(6000),
+    })
+
+
+def _check_plan(plan, summary, budget, cross_state):
+    group = np.zeros(len(plan), dtype=int) if cross_state else pd.factorize(plan['state'])[0]
+    spend = 0.0
+    for kit in KIT_TYPES:
+        now, after = plan[f'{kit}_Kits_Now'], plan[f'{kit}_Kits_Plan']
+        assert (after >= 0).all()
+        assert (after == now + plan[f'{kit}_Buy'] + plan[f'{kit}_Move']).all()
+        assert (plan[f'{kit}_Buy'] >= 0).all()
+        # Moves only shift existing kits: they cancel out within each state (or nationally)
+        assert not np.bincount(group, weights=plan[f'{kit}_Move']).any()
+        assert (plan[f'{kit}_Unserved_Plan'].sum() <= plan[f'{kit}_Unserved_Now'].sum() + 1e-6)
+        spend += plan[f'{kit}_Buy'].sum() * KIT_COST[kit] + plan[f'{kit}_Move'].clip(lower=0).sum() * MOVE_COST[kit]
+    assert spend <= budget + 1e-6
+    assert summary['Spend'] == pytest.approx(spend)
+
+
+@pytest.mark.parametrize('budget', [50.0, 500.0, 2000.0])
+def test_national_solve_is_fast_and_feasible(national, budget):
+    unserved = {}
+    for cross_state in [False, True]:
+        start = time.perf_counter()
+        plan, summary = optimize_allocation(national, DAYS, budget=budget, cross_state=cross_state)
+        assert time.perf_counter() - start < MAX_SECONDS
+        _check_plan(plan, summary, budget, cross_state)
+        unserved[cross_state] = sum(summary[f'{kit}_Unserved_Plan'] for kit in KIT_TYPES)
+    # Moving kits across states relaxes the within-state problem: never a worse plan
+    assert unserved[True] <= unserved[False] + 1e-6
@@ -0,0 +1,115 @@
+import http.client
+import io
+import json
+import os
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uidai_api
+from uidai_api import make_server
+from uidai_hierarchy import rollup_ratios, build_rollup, save_rollup
+from uidai_ranking import build_rank_index, save_rank_index
+from uidai_store import DISTRICT_CSV, MONTHLY_CSV
+
+
+@pytest.fixture(scope='module')
+def api(tmp_path_factory):
+    # Five districts in two states, written the way the pipeline writes them; no cluster labels
+    directory = tmp_path_factory.mktemp('api')
+    df = rollup_ratios(pd.DataFrame({
+        'state': ['Kerala', 'Kerala', 'Kerala', 'Goa', 'Goa'],
+        'district': ['Ernakulam', 'Idukki', 'Wayanad', 'North Goa', 'South Goa'],
+        'age_0_5': [120.0, 40.0, 15.0, 30.0, 25.0],
+        'age_5_17': [300.0, 90.0, 20.0, 45.0, 60.0],
+        'age_18_greater': [50.0, 5.0, 2.0, 8.0, 6.0],
+        'demo_age_5_17': [900.0, 120.0, 80.0, 150.0, 90.0],
+        'demo_age_17_': [4000.0, 700.0, 300.0, 900.0, 600.0],
+        'bio_age_5_17': [2500.0, 400.0, 350.0, 500.0, 410.0],
+        'bio_age_17_': [3000.0, 300.0, 900.0, 700.0, 650.0],
+    }))
+    df['CV_Volatility'] = [0.4, 0.9, 1.3, 0.7, 0.5]
+    df.to_csv(directory / DISTRICT_CSV, index=False)
+    pd.DataFrame({
+        'state': ['Kerala'] * 3 + ['Goa'] * 2,
+        'district': ['Ernakulam', 'Ernakulam', 'Idukki', 'North Goa', 'South Goa'],
+        'YearMonth': ['2025-01', '2025-02', '2025-01', '2025-01', '2025-01'],
+        'Enrol_Total': [10, 12, 4, 6, 5],
+    }).to_csv(directory / MONTHLY_CSV, index=False)
+    rollup = save_rollup(build_rollup(df), str(directory / uidai_api.ROLLUP_FILE))
+    save_rank_index(build_rank_index(df, rollup=rollup), str(directory / uidai_api.RANK_FILE))
+
+    server = make_server(str(directory), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _get(port, path, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_status_codes_and_revalidation(api):
+    response, body = _get(api, '/api/states/Kerala')
+    assert response.status == 200
+    assert json.loads(body)['districts'] == ['Ernakulam', 'Idukki', 'Wayanad']
+    etag = response.getheader('ETag')
+
+    assert _get(api, '/api/states/Nowhere')[0].status == 404
+    assert _get(api, '/api/rankings/Nothing')[0].status == 404
+    assert _get(api, '/api/clusters')[0].status == 503     # No Cluster_ID in the fixture
+
+    response, body = _get(api, '/api/states/Kerala', {'If-None-Match': etag})
+    assert response.status == 304 and body == b''
+    assert _get(api, '/api/states/Goa', {'If-None-Match': etag})[0].status == 200
+
+
+def test_state_rankings_match_state_endpoint(api):
+    for metric in ['UER_Score', 'Catch_Up_Index', 'Grand_Total']:
+        ranking = json.loads(_get(api, f'/api/rankings/{metric}?level=state')[1])
+        assert [row['state'] for row in ranking] == sorted(
+            ['Kerala', 'Goa'], key=lambda s: -json.loads(_get(api, f'/api/states/{s}')[1])['state'][metric])
+        for row in ranking:
+            state = json.loads(_get(api, f"/api/states/{row['state']}")[1])['state']
+            assert row['aggregate'] == 'rollup'
+            assert row['value'] == pytest.approx(state[metric], rel=1e-6)
+    # Metrics the rollup doesn't carry say how they were aggregated
+    ranking = json.loads(_get(api, '/api/rankings/CV_Volatility?level=state')[1])
+    assert {row['aggregate'] for row in ranking} == {'median'}
+    assert ranking[0] == {'rank': 1, 'state': 'Kerala', 'value': 0.9, 'aggregate': 'median'}
+
+
+def test_errors_are_json_500_and_not_cached(api, monkeypatch):
+    def broken(data, path, query):
+        raise KeyError('UER_Score')
+
+    monkeypatch.setattr(uidai_api, 'route', broken)
+    response, body = _get(api, '/api/states?fresh=1')
+    assert response.status == 500
+    assert response.getheader('Cache-Control') == 'no-store'
+    assert json.loads(body) == {'error': 'internal server error'}
+
+    monkeypatch.undo()
+    assert _get(api, '/api/states?fresh=1')[0].status == 200
+
+
+def test_export_is_streamed(api):
+    response, body = _get(api, '/api/export/csv?content=monthly&state=Kerala')
+    assert response.status == 200
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+    monthly = pd.read_csv(io.BytesIO(body))
+    assert list(monthly['district']) == ['Ernakulam', 'Ernakulam', 'Idukki']
+
+    response, body = _get(api, '/api/export/csv?district=Goa/South%20Goa')
+    assert list(pd.read_csv(io.BytesIO(body))['district']) == ['South Goa']
+    assert _get(api, '/api/export/xls')[0].status == 404
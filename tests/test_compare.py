@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uidai_compare import compare_districts
+
+
+def test_same_named_districts_stay_distinct():
+    df = pd.DataFrame({
+        'state': ['Himachal Pradesh', 'Himachal Pradesh', 'Chhattisgarh', 'Chhattisgarh'],
+        'district': ['Bilaspur', 'Mandi', 'Bilaspur', 'Raipur'],
+        'Grand_Total': [100.0, 200.0, 300.0, 400.0],
+        'UER_Score': [1.0, 2.0, 3.0, 4.0],
+    })
+    comparison = compare_districts(df, [0, 2])
+
+    labels = list(comparison['District'].unique())
+    assert labels == ['Bilaspur (Himachal Pradesh)', 'Bilaspur (Chhattisgarh)', 'Himachal Pradesh (median)']
+    # The dashboard's % / percentile table pivots on the label
+    table = comparison.pivot(index='District', columns='Metric', values='Pct_Diff')
+    assert table.loc['Bilaspur (Chhattisgarh)', 'Grand_Total'] == 200.0
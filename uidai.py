@@ -2,15 +2,26 @@ import pandas as pd
 import numpy as np
 import glob
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
-from math import pi
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
-
-# Set visual aesthetics
-sns.set_theme(style="whitegrid")
-plt.rcParams['figure.figsize'] = (14, 8)
+from uidai_cube import build_daily_cube, cube_frame
+from uidai_partitions import write_partitioned
+from uidai_ingest import RowDeduper
+from uidai_uncertainty import calculate_ratio_intervals, add_lower_bound_zscore, export_ratio_intervals
+from uidai_anomaly import run_anomaly_engine, load_anomaly_alerts
+from uidai_camps import detect_camps, summarize_camps, export_camp_calendar
+from uidai_weekday import build_weekday_profiles, export_weekday_profiles
+from uidai_capacity import build_capacity_report, export_capacity_report, cube_baseline_kits
+from uidai_allocation import optimize_allocation, export_allocation_plan
+from uidai_peers import build_peer_index, export_district_peers
+from uidai_seasonality import build_seasonality, save_seasonality, seasonal_profile
+from uidai_ranking import build_rank_index, save_rank_index, top_districts, top_states
+from uidai_hierarchy import build_rollup, save_rollup, rollup_level, region_of
+from uidai_render import render_charts
+from uidai_report import build_report, report_section
+from uidai_store import export_arrow, export_monthly_arrow, add_dashboard_features, atomic_write, DISTRICT_CSV
+from uidai_charts import (draw_radar, draw_digital_physical, draw_seasonality, draw_age_behavior,
+                          draw_pie, draw_stacked_top10, draw_cluster_scatter, bin_density, DENSITY_POINTS)
 
 # ==========================================
 # 1. DATA LOADING
@@ -26,15 +37,23 @@ def load_datasets(base_path="."):
     print("Loading datasets...")
     for category, pattern in files_map.items():
         full_pattern = os.path.join(base_path, pattern)
-        files = glob.glob(full_pattern)
+        files = sorted(glob.glob(full_pattern))   # Stable order across runs: the first copy of a row wins
         
         df_list = []
+        deduper = RowDeduper()
+        removed = 0
         for file in files:
             try:
                 temp = pd.read_csv(file)
-                df_list.append(temp)
             except Exception as e:
                 print(f"Skipped {file}: {e}")
+                continue
+            temp, within, across = deduper.filter(temp)
+            if within or across:
+                print(f"  -> {os.path.basename(file)}: dropped {within + across} duplicate rows "
+                      f"({within} within the shard, {across} from earlier shards)")
+            removed += within + across
+            df_list.append(temp)
         
         if df_list:
             df = pd.concat(df_list, ignore_index=True)
@@ -45,7 +64,7 @@ def load_datasets(base_path="."):
                 df['DayOfWeek'] = df['date'].dt.day_name()
                 df['IsWeekend'] = df['date'].dt.dayofweek.isin([5, 6])
             datasets[category] = df
-            print(f"  -> Loaded {category}: {len(df)} records")
+            print(f"  -> Loaded {category}: {len(df)} records ({removed} duplicates removed)")
         else:
             print(f"  -> No files found for {category}")
             datasets[category] = pd.DataFrame() 
@@ -429,6 +448,9 @@ def calculate_metrics(enrol, demo, bio):
 # 4. VISUALIZATION FUNCTIONS
 # ==========================================
 
+# Each plot_* function aggregates its input and returns a render job
+# (draw function, small table); render_charts() draws the jobs in parallel.
+
 # A. Radar Chart (Weekend Gap)
 def plot_radar_chart(enrol, demo, bio):
     # Combine data for daily volume
@@ -441,55 +463,27 @@ def plot_radar_chart(enrol, demo, bio):
     days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     daily_vol = master.groupby('Day')['vol'].sum().reindex(days_order).fillna(0)
     
-    # Radar Logic
-    values = daily_vol.values.flatten().tolist()
-    values += values[:1] 
-    angles = [n / float(len(days_order)) * 2 * pi for n in range(len(days_order))]
-    angles += angles[:1]
-    
-    plt.figure(figsize=(8, 8))
-    ax = plt.subplot(111, polar=True)
-    plt.xticks(angles[:-1], days_order, color='grey', size=10)
-    ax.plot(angles, values, linewidth=1, linestyle='solid', color='blue')
-    ax.fill(angles, values, 'b', alpha=0.1)
-    plt.title('Weekly Activity Radar: The "Sunday Service Gap"', size=15, y=1.1)
-    plt.tight_layout()
-    plt.savefig('vis_radar_weekly.png')
-    plt.show()
+    return draw_radar, {'values': daily_vol.values.flatten().tolist(), 'days_order': days_order,
+                        'filename': 'vis_radar_weekly.png'}
 
 # B. Stacked Bar (Digital vs Physical)
-def plot_digital_physical(metrics_df):
-    # Sort by Total Volume for Top 10 States
-    top_states = metrics_df.groupby('state')[['Update_Total', 'demo_age_17_', 'bio_age_17_']].sum()
-    top_states = top_states.sort_values('Update_Total', ascending=False).head(10)
+def plot_digital_physical(rollup, ranks):
+    # Top 10 States by Total Volume, read from the shared ranking index and the rollup
+    state_totals = rollup_level(rollup, 'state')[['Update_Total', 'demo_age_17_', 'bio_age_17_']]
+    top = state_totals.loc[top_states(ranks, 'Update_Total')].copy()
     
     # Calc Ratios
-    top_states['Demo_Share'] = top_states['demo_age_17_'] / top_states['Update_Total']
-    top_states['Bio_Share'] = top_states['bio_age_17_'] / top_states['Update_Total']
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(top_states.index, top_states['Demo_Share'], label='Demographic (Online/Easy)', color='#4c72b0')
-    plt.bar(top_states.index, top_states['Bio_Share'], bottom=top_states['Demo_Share'], label='Biometric (Physical/Hard)', color='#55a868')
-    plt.title('Digital Maturity: Demographic vs Biometric Update Composition', fontsize=14)
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig('vis_stacked_split.png')
-    plt.show()
+    top['Demo_Share'] = top['demo_age_17_'] / top['Update_Total']
+    top['Bio_Share'] = top['bio_age_17_'] / top['Update_Total']
+    
+    return draw_digital_physical, {'top_states': top[['Demo_Share', 'Bio_Share']],
+                                   'filename': 'vis_stacked_split.png'}
 
 # C. Seasonality Line Chart
-def plot_seasonality(enrol):
-    monthly = enrol.groupby('Month')['age_5_17'].sum().reindex([
-        'January', 'February', 'March', 'April', 'May', 'June', 
-        'July', 'August', 'September', 'October', 'November', 'December'
-    ])
-    plt.figure(figsize=(12, 5))
-    monthly.plot(marker='o', linestyle='-', color='purple')
-    plt.title('The "School Pulse": Monthly Seasonality of Child Enrolments', fontsize=14)
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig('vis_seasonality.png')
-    plt.show()
+def plot_seasonality(season):
+    # National child (5-17) enrolments by calendar month, one line per year
+    monthly = seasonal_profile(season, 'age_5_17').drop(columns='Index')
+    return draw_seasonality, {'monthly': monthly, 'filename': 'vis_seasonality.png'}
 
 # ==========================================
 # 5. EXECUTION MAIN
@@ -505,56 +499,90 @@ bio_df = clean_data(bio_df)
 # ==========================================
 # GENERATE MONTHLY TRENDS CSV
 # ==========================================
-export_monthly_data(enrol_df, demo_df, bio_df)
+monthly_ts = export_monthly_data(enrol_df, demo_df, bio_df)
+export_monthly_arrow(monthly_ts)
+write_partitioned(monthly_ts, 'monthly')   # state x month Parquet tree; only changed partitions rewritten
+
+# Score any new months against state & own-history baselines (writes the alerts table)
+run_anomaly_engine(monthly_ts)
 # ==========================================
 
 # 3. Calculate Metrics
 metrics_df = calculate_metrics(enrol_df, demo_df, bio_df)
 
+# 3b. Uncertainty: bootstrap CIs from the daily cube, rank on the lower bound
+daily_cube = build_daily_cube(enrol_df, demo_df, bio_df)
+write_partitioned(cube_frame(daily_cube), 'daily')
+ratio_ci = export_ratio_intervals(calculate_ratio_intervals(daily_cube))
+ci_cols = ['R1_UER_Lo', 'R3_Catch_Up_Index_Lo', 'R4_Adult_Entry_Rate_Lo']
+metrics_df = metrics_df.join(ratio_ci[ci_cols], how='left')
+metrics_df = add_lower_bound_zscore(metrics_df)
+
+# 3b'. District -> state -> region -> nation sums and ratios; state/regional views read from here
+metric_rollup = build_rollup(metrics_df.reset_index())
+
+# 3b''. Rank every registry metric once; charts and reports read top-N from here
+metric_ranks = build_rank_index(metrics_df, rollup=metric_rollup)
+
+# 3b'''. Monthly seasonality per district/state/nation (School Pulse chart, forecasting)
+seasonality = save_seasonality(build_seasonality(daily_cube))
+
+# 3c. Per-district weekday load profiles (read by the dashboard's wait-time chart)
+weekday_profiles = export_weekday_profiles(build_weekday_profiles(enrol_df, demo_df, bio_df))
+
+# 3d. Queueing model: expected waits per district & day for the current kit counts
+capacity_report = export_capacity_report(build_capacity_report(daily_cube))
+
+# 3e. Baseline national kit redeployment plan (the dashboard re-solves what-if scenarios)
+# Same assumed kits as the capacity model (both computed over the cube's districts)
+allocation_districts = metrics_df.reset_index()
+allocation_plan, allocation_summary = optimize_allocation(
+    allocation_districts, days=len(daily_cube['dates']),
+    inventory=cube_baseline_kits(daily_cube, allocation_districts))
+export_allocation_plan(allocation_plan)
+
 # 4. Generate Visualizations
-plot_radar_chart(enrol_df, demo_df, bio_df)
-plot_digital_physical(metrics_df)
-plot_seasonality(enrol_df)
+pipeline_charts = [
+    plot_radar_chart(enrol_df, demo_df, bio_df),
+    plot_digital_physical(metric_rollup, metric_ranks),
+    plot_seasonality(seasonality)
+]
+pipeline_render = render_charts(pipeline_charts)
 
 # 5. Print Top Insights
 print("\n" + "="*50)
 print("AADHAAR 360 ANALYSIS REPORT")
 print("="*50)
-print("\n[INSIGHT 1] Top 10 'Maintenance Only' Districts (High UER):")
-print(metrics_df.sort_values('R1_UER', ascending=False)['R1_UER'].head(10))
-
-print("\n[INSIGHT 2] Top 10 'Missing Births' Districts (High Catch-up Index):")
-print(metrics_df.sort_values('R3_Catch_Up_Index', ascending=False)['R3_Catch_Up_Index'].head(10))
-
-print("\n[INSIGHT 3] Top 10 Anomalous Adult Enrolments (Potential Fraud):")
-print(metrics_df.sort_values('R7_Adult_ZScore', ascending=False)[['R4_Adult_Entry_Rate', 'R7_Adult_ZScore']].head(10))
+insight_uer = metrics_df.iloc[top_districts(metric_ranks, 'R1_UER_Lo')][['R1_UER', 'R1_UER_Lo']]
+print("\n[INSIGHT 1] Top 10 'Maintenance Only' Districts (High UER, ranked on 95% lower bound):")
+print(insight_uer)
+
+insight_catch_up = metrics_df.iloc[top_districts(metric_ranks, 'R3_Catch_Up_Index_Lo')][['R3_Catch_Up_Index', 'R3_Catch_Up_Index_Lo']]
+print("\n[INSIGHT 2] Top 10 'Missing Births' Districts (High Catch-up Index, ranked on 95% lower bound):")
+print(insight_catch_up)
+
+insight_adult = metrics_df.iloc[top_districts(metric_ranks, 'R7_Adult_ZScore_Lo')][['R4_Adult_Entry_Rate', 'R7_Adult_ZScore', 'R7_Adult_ZScore_Lo']]
+print("\n[INSIGHT 3] Top 10 Anomalous Adult Enrolments (Potential Fraud, ranked on 95% lower bound):")
+print(insight_adult)
+
+# From the stored table, so a rerun with no new month still reports the latest alerts
+anomaly_alerts = load_anomaly_alerts()
+insight_anomalies, anomaly_month = None, None
+if not anomaly_alerts.empty:
+    latest = anomaly_alerts[anomaly_alerts['YearMonth'] == anomaly_alerts['YearMonth'].max()].copy()
+    latest['Severity'] = latest[['Z_State', 'Z_Self']].abs().max(axis=1)
+    anomaly_month = latest['YearMonth'].iloc[0]
+    insight_anomalies = latest.sort_values('Severity', ascending=False)[['state', 'district', 'Metric', 'Value', 'Z_State', 'Z_Self']].head(10)
+    print(f"\n[INSIGHT 4] Top 10 District Anomalies in {anomaly_month} (Robust Z vs State & Own History):")
+    print(insight_anomalies)
 # ==========================================
 # PHASE 2: REGIONAL & VOLATILITY EXPANSION
 # ==========================================
-def calculate_phase2_metrics(enrol_df):
+def calculate_phase2_metrics(enrol_df, rollup):
     print("\nCalculating Phase 2 Metrics (Regional & Stability)...")
     
-    # 1. Regional Mapping
-    region_map = {
-        'Jammu and Kashmir': 'North', 'Himachal Pradesh': 'North', 'Punjab': 'North', 
-        'Uttarakhand': 'North', 'Haryana': 'North', 'Delhi': 'North', 'Uttar Pradesh': 'North',
-        'Bihar': 'East', 'Jharkhand': 'East', 'West Bengal': 'East', 'Odisha': 'East',
-        'Rajasthan': 'West', 'Gujarat': 'West', 'Maharashtra': 'West', 'Goa': 'West',
-        'Madhya Pradesh': 'Central', 'Chhattisgarh': 'Central',
-        'Andhra Pradesh': 'South', 'Telangana': 'South', 'Karnataka': 'South', 
-        'Kerala': 'South', 'Tamil Nadu': 'South',
-        'Assam': 'North East', 'Meghalaya': 'North East', 'Mizoram': 'North East', 
-        'Nagaland': 'North East', 'Tripura': 'North East', 'Manipur': 'North East'
-    }
-    
-    # 2. Regional Analysis
-    # We aggregate state stats first, then map to region
-    state_stats = enrol_df.groupby('state')[['age_18_greater']].sum()
-    state_stats['Total_Enrol'] = enrol_df.groupby('state')[['age_0_5', 'age_5_17', 'age_18_greater']].sum().sum(axis=1)
-    state_stats['Region'] = state_stats.index.map(region_map).fillna('Other')
-    
-    regional = state_stats.groupby('Region').sum()
-    regional['Adult_Share_Pct'] = (regional['age_18_greater'] / regional['Total_Enrol']) * 100
+    # 1-2. Regional Analysis: read from the hierarchy rollup (one region per state/UT)
+    regional = rollup_level(rollup, 'region')[['age_18_greater', 'Enrol_Total', 'Adult_Share_Pct']]
     
     # 3. Volatility Analysis (CV)
     # Filter for districts with >30 days of activity
@@ -566,13 +594,23 @@ def calculate_phase2_metrics(enrol_df):
     return regional, volatility
 
 # Execution (Add this to your main block)
-regional_stats, volatility_stats = calculate_phase2_metrics(enrol_df)
+regional_stats, volatility_stats = calculate_phase2_metrics(enrol_df, metric_rollup)
 
 print("\n[PHASE 2] Regional Adult Enrolment Share:")
-print(regional_stats['Adult_Share_Pct'].sort_values(ascending=False))
+regional_share = regional_stats['Adult_Share_Pct'].sort_values(ascending=False)
+print(regional_share)
 
 print("\n[PHASE 2] Most Volatile Districts (Likely Camps):")
-print(volatility_stats.sort_values('CV_Score', ascending=False)['CV_Score'].head(5))
+volatile_districts = volatility_stats.sort_values('CV_Score', ascending=False)['CV_Score'].head(5)
+print(volatile_districts)
+
+# Actual camp days: burst detection on every district's daily series
+camp_calendar = export_camp_calendar(detect_camps(daily_cube))
+camp_summary = summarize_camps(camp_calendar, daily_cube)
+
+print("\n[PHASE 2] Most Camp-Driven Districts (Detected Bursts):")
+camp_districts = camp_summary.sort_values('Camp_Excess', ascending=False)[['Camp_Count', 'Camp_Days', 'Camp_Excess', 'Camp_Share']].head(5)
+print(camp_districts)
 
 # ======================================================
 # SNIPPET: EXPORT FULL DISTRICT DATA (FOR DASHBOARDS)
@@ -603,16 +641,7 @@ def export_full_district_data(enrol, demo, bio):
     full_df['Catch_Up_Index'] = full_df['age_5_17'] / (full_df['age_0_5'] + 1)
     
     # 4. Add Phase 2 Metrics: Volatility (CV) & Region
-    # Region Map
-    region_map = {
-        'Jammu and Kashmir': 'North', 'Himachal Pradesh': 'North', 'Punjab': 'North', 'Uttarakhand': 'North', 'Haryana': 'North', 'Delhi': 'North', 'Uttar Pradesh': 'North',
-        'Bihar': 'East', 'Jharkhand': 'East', 'West Bengal': 'East', 'Odisha': 'East',
-        'Rajasthan': 'West', 'Gujarat': 'West', 'Maharashtra': 'West', 'Goa': 'West',
-        'Madhya Pradesh': 'Central', 'Chhattisgarh': 'Central',
-        'Andhra Pradesh': 'South', 'Telangana': 'South', 'Karnataka': 'South', 'Kerala': 'South', 'Tamil Nadu': 'South',
-        'Assam': 'North East', 'Meghalaya': 'North East', 'Mizoram': 'North East', 'Nagaland': 'North East', 'Tripura': 'North East', 'Manipur': 'North East'
-    }
-    full_df['Region'] = full_df.index.get_level_values('state').map(region_map).fillna('Other')
+    full_df['Region'] = region_of(full_df.index.get_level_values('state'))
 
     # Volatility Calculation (CV)
     if 'date' in enrol.columns:
@@ -662,38 +691,34 @@ def calculate_age_bucket_analytics(df):
     
     return df
 
-def plot_age_behavior(df):
-    print("[Plotting] Generating Age-Behavior Comparison...")
-    
+def plot_age_behavior(df, density=None):
     # Visualization: Child vs Adult Biometric Intensity
     # We expect Children to be High Bio, Adults to be Low Bio. Deviations are anomalies.
     
-    plt.figure(figsize=(10, 6))
-    
-    # Filter for cleaner plot
-    plot_data = df[df['Grand_Total'] > 1000].sample(frac=0.5, random_state=42) # Sample for readability
-    
-    sns.scatterplot(
-        data=plot_data, 
-        x='R22_Adult_Bio_Intensity', 
-        y='R21_Child_Bio_Intensity',
-        hue='Region',
-        alpha=0.6
-    )
-    
-    # Add diagonal line (Parity)
-    max_val = min(plot_data['R21_Child_Bio_Intensity'].max(), 10)
-    plt.plot([0, max_val], [0, max_val], 'r--', label='Equal Intensity')
-    
-    plt.title('Behavioral Gap: Mandatory Child Bios vs Voluntary Adult Fixes', fontsize=14)
-    plt.xlabel('Adult Bio Intensity (Voluntary)', fontsize=12)
-    plt.ylabel('Child Bio Intensity (Mandatory)', fontsize=12)
-    plt.xlim(0, 5) # Zoom in to relevant range
-    plt.ylim(0, 10)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('vis_age_behavior.png')
-    print("   -> Saved 'vis_age_behavior.png'")
+    # Filter for cleaner plot (low-volume districts give noisy ratios)
+    plot_data = df[df['Grand_Total'] > 1000]
+    plot_data = plot_data[['R22_Adult_Bio_Intensity', 'R21_Child_Bio_Intensity', 'Region']]
+    parity_max = min(plot_data['R21_Child_Bio_Intensity'].max(), 10)
+
+    # Large point sets (e.g. district-month) are binned instead of sampled
+    if density is None:
+        density = len(plot_data) > DENSITY_POINTS
+    if density:
+        binned = bin_density(plot_data, 'R22_Adult_Bio_Intensity', 'R21_Child_Bio_Intensity',
+                             hue='Region', extent=(0, 5, 0, 10))
+        return draw_age_behavior, {'plot_data': None, 'density': binned, 'parity_max': parity_max,
+                                   'filename': 'vis_age_behavior.png'}
+    return draw_age_behavior, {'plot_data': plot_data, 'parity_max': parity_max,
+                               'filename': 'vis_age_behavior.png'}
+
+def plot_cluster_scatter(df, density=None):
+    plot_data = df.loc[df['Grand_Total'] > 1000, ['UER_Score', 'Catch_Up_Index', 'Cluster_ID']]
+    if density is None:
+        density = len(plot_data) > DENSITY_POINTS
+    if density:
+        binned = bin_density(plot_data, 'UER_Score', 'Catch_Up_Index', hue='Cluster_ID')
+        return draw_cluster_scatter, {'plot_data': None, 'density': binned, 'filename': 'vis_ml_clusters.png'}
+    return draw_cluster_scatter, {'plot_data': plot_data, 'filename': 'vis_ml_clusters.png'}
 
 # ==========================================
 # ML MODULE: K-MEANS CLUSTERING
@@ -764,8 +789,6 @@ def process_final_data(filename='aadhaar_district_analytics_full.csv'):
 # BASIC VISUALIZATIONS
 # ==========================================
 def plot_basic_visualizations(df):
-    print("\n[Plotting] Generating Basic Visualizations...")
-    
     # Ensure numeric columns
     cols_to_numeric = ['age_0_5', 'age_5_17', 'age_18_greater', 
                        'demo_age_5_17', 'demo_age_17_', 
@@ -779,35 +802,30 @@ def plot_basic_visualizations(df):
     total_age_0_5 = df['age_0_5'].sum()
     total_age_5_17 = df['age_5_17'].sum()
     total_age_18_plus = df['age_18_greater'].sum()
-    
-    plt.figure(figsize=(8, 8))
-    labels = ['Age 0-5', 'Age 5-17', 'Age 18+']
-    sizes = [total_age_0_5, total_age_5_17, total_age_18_plus]
-    colors = ['#ff9999','#66b3ff','#99ff99']
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=colors)
-    plt.title('Overall Enrolment Composition by Age Group')
-    plt.savefig('vis_pie_enrolment_age.png')
-    print("   -> Generated 'vis_pie_enrolment_age.png'")
+    enrol_pie = (draw_pie, {
+        'sizes': [total_age_0_5, total_age_5_17, total_age_18_plus],
+        'labels': ['Age 0-5', 'Age 5-17', 'Age 18+'],
+        'colors': ['#ff9999','#66b3ff','#99ff99'],
+        'title': 'Overall Enrolment Composition by Age Group',
+        'filename': 'vis_pie_enrolment_age.png'
+    })
 
     # 2. Pie Chart: Update Types
     total_demo = df['demo_age_5_17'].sum() + df['demo_age_17_'].sum()
     total_bio = df['bio_age_5_17'].sum() + df['bio_age_17_'].sum()
-    
-    plt.figure(figsize=(8, 8))
-    labels = ['Demographic Updates', 'Biometric Updates']
-    sizes = [total_demo, total_bio]
-    colors = ['#ffcc99','#c2c2f0']
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=colors)
-    plt.title('Overall Update Composition (Demo vs Bio)')
-    plt.savefig('vis_pie_updates_type.png')
-    print("   -> Generated 'vis_pie_updates_type.png'")
+    update_pie = (draw_pie, {
+        'sizes': [total_demo, total_bio],
+        'labels': ['Demographic Updates', 'Biometric Updates'],
+        'colors': ['#ffcc99','#c2c2f0'],
+        'title': 'Overall Update Composition (Demo vs Bio)',
+        'filename': 'vis_pie_updates_type.png'
+    })
+    return [enrol_pie, update_pie]
 
 # ==========================================
 # ADDITIONAL VISUALIZATIONS
 # ==========================================
-def plot_additional_visualizations(df):
-    print("\n[Plotting] Generating Top 10 Charts...")
-    
+def plot_additional_visualizations(df, ranks=None, rollup=None):
     # Ensure correct data types
     cols_to_numeric = ['age_0_5', 'age_5_17', 'age_18_greater', 
                        'demo_age_5_17', 'demo_age_17_', 
@@ -823,111 +841,47 @@ def plot_additional_visualizations(df):
     df['Demo_Total'] = df['demo_age_5_17'] + df['demo_age_17_']
     df['Bio_Total'] = df['bio_age_5_17'] + df['bio_age_17_']
 
-    # --- 1. Top 10 Districts: Enrolment (Stacked) ---
-    top_dist_enrol = df.sort_values('Enrol_Total', ascending=False).head(10)
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(top_dist_enrol['district'], top_dist_enrol['age_0_5'], color='blue', label='Age 0-5')
-    plt.bar(top_dist_enrol['district'], top_dist_enrol['age_5_17'], bottom=top_dist_enrol['age_0_5'], color='red', label='Age 5-17')
-    plt.bar(top_dist_enrol['district'], top_dist_enrol['age_18_greater'], bottom=top_dist_enrol['age_0_5'] + top_dist_enrol['age_5_17'], color='yellow', label='Age 18+')
-    
-    plt.title('Top 10 Districts: Enrolment Breakdown', fontsize=14)
-    plt.ylabel('Total Enrolment')
-    plt.xlabel('District')
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('vis_top10_dist_enrol.png')
-    print("   -> Generated 'vis_top10_dist_enrol.png'")
-
-    # --- 2. Top 10 Districts: Demo Update (Stacked) ---
-    top_dist_demo = df.sort_values('Demo_Total', ascending=False).head(10)
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(top_dist_demo['district'], top_dist_demo['demo_age_5_17'], color='blue', label='Age 5-17')
-    plt.bar(top_dist_demo['district'], top_dist_demo['demo_age_17_'], bottom=top_dist_demo['demo_age_5_17'], color='red', label='Age 18+')
-    
-    plt.title('Top 10 Districts: Demographic Updates Breakdown', fontsize=14)
-    plt.ylabel('Total Demo Updates')
-    plt.xlabel('District')
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('vis_top10_dist_demo.png')
-    print("   -> Generated 'vis_top10_dist_demo.png'")
-
-    # --- 3. Top 10 Districts: Bio Update (Stacked) ---
-    top_dist_bio = df.sort_values('Bio_Total', ascending=False).head(10)
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(top_dist_bio['district'], top_dist_bio['bio_age_5_17'], color='blue', label='Age 5-17')
-    plt.bar(top_dist_bio['district'], top_dist_bio['bio_age_17_'], bottom=top_dist_bio['bio_age_5_17'], color='red', label='Age 18+')
-    
-    plt.title('Top 10 Districts: Biometric Updates Breakdown', fontsize=14)
-    plt.ylabel('Total Bio Updates')
-    plt.xlabel('District')
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('vis_top10_dist_bio.png')
-    print("   -> Generated 'vis_top10_dist_bio.png'")
-
-    # --- STATE LEVEL AGGREGATION ---
-    state_df = df.groupby('state')[['age_0_5', 'age_5_17', 'age_18_greater', 
-                                    'demo_age_5_17', 'demo_age_17_', 
-                                    'bio_age_5_17', 'bio_age_17_']].sum().reset_index()
-    state_df['Enrol_Total'] = state_df['age_0_5'] + state_df['age_5_17'] + state_df['age_18_greater']
-    state_df['Demo_Total'] = state_df['demo_age_5_17'] + state_df['demo_age_17_']
-    state_df['Bio_Total'] = state_df['bio_age_5_17'] + state_df['bio_age_17_']
-
-    # --- 4. Top 10 States: Enrolment (Stacked) ---
-    top_state_enrol = state_df.sort_values('Enrol_Total', ascending=False).head(10)
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(top_state_enrol['state'], top_state_enrol['age_0_5'], color='blue', label='Age 0-5')
-    plt.bar(top_state_enrol['state'], top_state_enrol['age_5_17'], bottom=top_state_enrol['age_0_5'], color='red', label='Age 5-17')
-    plt.bar(top_state_enrol['state'], top_state_enrol['age_18_greater'], bottom=top_state_enrol['age_0_5'] + top_state_enrol['age_5_17'], color='yellow', label='Age 18+')
-    
-    plt.title('Top 10 States: Enrolment Breakdown', fontsize=14)
-    plt.ylabel('Total Enrolment')
-    plt.xlabel('State')
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('vis_top10_state_enrol.png')
-    print("   -> Generated 'vis_top10_state_enrol.png'")
-
-    # --- 5. Top 10 States: Demo Update (Stacked) ---
-    top_state_demo = state_df.sort_values('Demo_Total', ascending=False).head(10)
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(top_state_demo['state'], top_state_demo['demo_age_5_17'], color='blue', label='Age 5-17')
-    plt.bar(top_state_demo['state'], top_state_demo['demo_age_17_'], bottom=top_state_demo['demo_age_5_17'], color='red', label='Age 18+')
-    
-    plt.title('Top 10 States: Demographic Updates Breakdown', fontsize=14)
-    plt.ylabel('Total Demo Updates')
-    plt.xlabel('State')
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('vis_top10_state_demo.png')
-    print("   -> Generated 'vis_top10_state_demo.png'")
-
-    # --- 6. Top 10 States: Bio Update (Stacked) ---
-    top_state_bio = state_df.sort_values('Bio_Total', ascending=False).head(10)
-    
-    plt.figure(figsize=(12, 6))
-    plt.bar(top_state_bio['state'], top_state_bio['bio_age_5_17'], color='blue', label='Age 5-17')
-    plt.bar(top_state_bio['state'], top_state_bio['bio_age_17_'], bottom=top_state_bio['bio_age_5_17'], color='red', label='Age 18+')
-    
-    plt.title('Top 10 States: Biometric Updates Breakdown', fontsize=14)
-    plt.ylabel('Total Bio Updates')
-    plt.xlabel('State')
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('vis_top10_state_bio.png')
-    print("   -> Generated 'vis_top10_state_bio.png'")
+    enrol_stack = [('age_0_5', 'blue', 'Age 0-5'), ('age_5_17', 'red', 'Age 5-17'), ('age_18_greater', 'yellow', 'Age 18+')]
+    demo_stack = [('demo_age_5_17', 'blue', 'Age 5-17'), ('demo_age_17_', 'red', 'Age 18+')]
+    bio_stack = [('bio_age_5_17', 'blue', 'Age 5-17'), ('bio_age_17_', 'red', 'Age 18+')]
+
+    if rollup is None:
+        rollup = build_rollup(df)
+    if ranks is None:
+        ranks = build_rank_index(df, rollup=rollup)
+
+    def top10_job(top, label_col, stack, title, ylabel, filename):
+        top = top[[label_col] + [c for c, _, _ in stack]]
+        return draw_stacked_top10, {'table': top, 'label_col': label_col, 'stacks': stack, 'title': title,
+                                    'ylabel': ylabel, 'xlabel': label_col.title(), 'filename': filename}
+
+    # --- STATE LEVEL AGGREGATION (from the hierarchy rollup) ---
+    state_df = rollup_level(rollup, 'state').reset_index()
+    state_pos = pd.Series(np.arange(len(state_df)), index=state_df['state'])
+
+    # Top 10 rows straight from the ranking index (no sorting here)
+    def top_dist(metric):
+        return df.iloc[top_districts(ranks, metric)]
+
+    def top_state(metric):
+        return state_df.iloc[state_pos[top_states(ranks, metric)]]
+
+    return [
+        # --- 1-3. Top 10 Districts: Enrolment / Demo / Bio (Stacked) ---
+        top10_job(top_dist('Enrol_Total'), 'district', enrol_stack, 'Top 10 Districts: Enrolment Breakdown',
+                  'Total Enrolment', 'vis_top10_dist_enrol.png'),
+        top10_job(top_dist('Demo_Total'), 'district', demo_stack, 'Top 10 Districts: Demographic Updates Breakdown',
+                  'Total Demo Updates', 'vis_top10_dist_demo.png'),
+        top10_job(top_dist('Bio_Total'), 'district', bio_stack, 'Top 10 Districts: Biometric Updates Breakdown',
+                  'Total Bio Updates', 'vis_top10_dist_bio.png'),
+        # --- 4-6. Top 10 States: Enrolment / Demo / Bio (Stacked) ---
+        top10_job(top_state('Enrol_Total'), 'state', enrol_stack, 'Top 10 States: Enrolment Breakdown',
+                  'Total Enrolment', 'vis_top10_state_enrol.png'),
+        top10_job(top_state('Demo_Total'), 'state', demo_stack, 'Top 10 States: Demographic Updates Breakdown',
+                  'Total Demo Updates', 'vis_top10_state_demo.png'),
+        top10_job(top_state('Bio_Total'), 'state', bio_stack, 'Top 10 States: Biometric Updates Breakdown',
+                  'Total Bio Updates', 'vis_top10_state_bio.png'),
+    ]
 
 if __name__ == "__main__":
     # 1. Process
@@ -936,12 +890,24 @@ if __name__ == "__main__":
     # 2. Add Machine Learning
     master_df = perform_clustering(master_df)
     
-    # 3. Save Final
+    # 3. Save Final (with the dashboard's precomputed scores)
+    master_df = add_dashboard_features(master_df)
     master_df.to_csv('aadhaar_district_analytics_ML_final.csv', index=False)
     # Also save as the cleaned file for the App to use
-    master_df.to_csv('aadhaar_district_analytics_final_cleaned.csv', index=False)
+    atomic_write(DISTRICT_CSV, lambda path: master_df.to_csv(path, index=False))  # The dashboard may be reading it
     
     print("[3/3] Success! Saved corrected data to 'aadhaar_district_analytics_final_cleaned.csv'")
+    # Memory-mapped columnar copy the dashboard loads instead of parsing the CSV
+    export_arrow(master_df)
+    
+    # 4. Nearest peer districts for the dashboard's "districts like this one"
+    export_district_peers(build_peer_index(master_df))
+
+    # 5. State / region / national rollup for the dashboard's benchmark figures
+    master_rollup = save_rollup(build_rollup(master_df))
+
+    # 6. Rank/percentile index for the dashboard's "rank within state/nation" badges
+    save_rank_index(build_rank_index(master_df, rollup=master_rollup))
 # ==========================================
 # FINAL EXECUTION BLOCK
 # ==========================================
@@ -956,23 +922,45 @@ if __name__ == "__main__":
     master_df.to_csv('aadhaar_district_analytics_ML_final.csv', index=False)
     print("[3/3] Success! Saved 'aadhaar_district_analytics_ML_final.csv'")
     
-    # 4. Generate the Age Plot
-    plot_age_behavior(master_df)
-    plot_additional_visualizations(master_df)
-    plot_basic_visualizations(master_df)
-
-    # 5. Visualize Clusters
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(
-        data=master_df[master_df['Grand_Total'] > 1000],
-        x='UER_Score',
-        y='Catch_Up_Index',
-        hue='Cluster_ID',
-        palette='viridis',
-        s=100, alpha=0.7
-    )
-    plt.title('ML-Based District Segmentation', fontsize=14)
-    plt.xlabel('Maintenance Intensity (UER)', fontsize=12)
-    plt.ylabel('Growth Potential (Catch-up Index)', fontsize=12)
-    plt.savefig('vis_ml_clusters.png')
-    print("   -> Saved 'vis_ml_clusters.png'")
+    # 4. Render all district-level charts in parallel (headless)
+    district_charts = [
+        plot_age_behavior(master_df),
+        *plot_additional_visualizations(master_df),
+        *plot_basic_visualizations(master_df),
+        plot_cluster_scatter(master_df)
+    ]
+    district_render = render_charts(district_charts)
+
+    # 5. One consolidated HTML + PDF report from the aggregates above (no CSV re-reads)
+    cluster_features = ['UER_Score', 'Catch_Up_Index', 'Adult_Entry_Rate', 'CV_Volatility']
+    report_sections = [
+        report_section("Top 10 'Maintenance Only' Districts", insight_uer,
+                       note="High update-to-enrolment ratio, ranked on the 95% lower bound."),
+        report_section("Top 10 'Missing Births' Districts", insight_catch_up,
+                       note="High catch-up index, ranked on the 95% lower bound."),
+        report_section("Top 10 Anomalous Adult Enrolments", insight_adult,
+                       note="Potential fraud, ranked on the 95% lower bound of the adult entry z-score."),
+        report_section("Regional Adult Enrolment Share (%)", regional_share),
+        report_section("Most Volatile Districts (Likely Camps)", volatile_districts),
+        report_section("Most Camp-Driven Districts (Detected Bursts)", camp_districts),
+        report_section("Cluster Profiles (Centroids)", master_df.groupby('Cluster_ID')[cluster_features].mean(),
+                       chart='vis_ml_clusters.png'),
+        report_section("Weekly Activity", chart='vis_radar_weekly.png'),
+        report_section("Digital Maturity by State", chart='vis_stacked_split.png'),
+        report_section("School Pulse Seasonality", chart='vis_seasonality.png'),
+        report_section("Child vs Adult Biometric Intensity", chart='vis_age_behavior.png'),
+        *[report_section(kw['title'], chart=kw['filename'])
+          for _, kw in district_charts if 'title' in kw],        # Top 10 bars & composition pies
+    ]
+    if insight_anomalies is not None:
+        report_sections.insert(3, report_section(f"District Anomalies in {anomaly_month}", insight_anomalies,
+                                                 note="Robust z-score against the state and the district's own history."))
+    build_report(report_sections, {
+        'Generated': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'),
+        'Data Window': f"{daily_cube['dates'][0]:%d %b %Y} to {daily_cube['dates'][-1]:%d %b %Y}",
+        'Source Records': f"{len(enrol_df):,} enrolment, {len(demo_df):,} demographic, {len(bio_df):,} biometric",
+        'Districts': f"{len(master_df):,} in {master_df['state'].nunique()} states/UTs",
+        'Kit Plan': f"Rs. {allocation_summary['Spend']:.1f} lakh ({allocation_summary['status']})",
+        'Charts': f"{pipeline_render['charts'] + district_render['charts']} drawn, "
+                  f"{pipeline_render['cached'] + district_render['cached']} unchanged",
+    })
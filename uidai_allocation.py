@@ -0,0 +1,242 @@
+import pandas as pd
+import numpy as np
+import time
+from scipy import sparse
+from scipy.optimize import milp, LinearConstraint, Bounds
+from uidai_capacity import SERVICE_MINUTES, OPEN_HOURS, TARGET_UTILIZATION, KIT_WORK, district_totals, baseline_kits
+
+# ==========================================
+# NATIONAL KIT / OPERATOR ALLOCATION (SPARSE MILP)
+# ==========================================
+KIT_TYPES = list(KIT_WORK)
+# Capital cost per new kit and cost per redeployed kit, in Rs. lakh
+KIT_COST = {'Enrol': 1.5, 'Update': 0.6}
+MOVE_COST = {'Enrol': 0.1, 'Update': 0.05}
+# Solver time limit for one plan (all calls): grows with the model, never below the floor
+TIME_LIMIT_FLOOR = 5.0
+SECONDS_PER_1K_VARS = 1.0
+MIN_SOLVE_SECONDS = 1.0
+# Shortfall (transactions/day) treated as zero: such a plan is optimal whatever the solver status
+SHORTFALL_TOLERANCE = 1.0
+# Variable blocks per kit type: kits after the plan, unserved demand, bought, moved in, moved out
+BLOCKS = ['kits', 'short', 'buy', 'move_in', 'move_out']
+
+def allocation_inputs(df, days):
+    # District totals -> average daily demand and per-kit daily throughput for both kit types
+    totals = district_totals(df)
+    demo, bio = totals['demo'], totals['bio']
+    update_minutes = (demo * SERVICE_MINUTES['demo'] + bio * SERVICE_MINUTES['bio']) / np.maximum(demo + bio, 1)
+    update_minutes = np.where(demo + bio > 0, update_minutes, SERVICE_MINUTES['demo'])
+    capacity_minutes = OPEN_HOURS * 60 * TARGET_UTILIZATION
+    return {
+        'Enrol': (totals['enrol'] / days,
+                  np.full(len(df), capacity_minutes / SERVICE_MINUTES['enrol'])),
+        'Update': ((demo + bio) / days,
+                   capacity_minutes / update_minutes),
+    }
+
+def _share_out(amount, capacity, group):
+    # Splits each group's amount over its districts in order, up to each district's capacity
+    order = np.argsort(group, kind='stable')
+    sorted_group, room = group[order], capacity[order]
+    before = np.cumsum(room) - room                        # Capacity earlier in the sort order
+    starts = np.r_[0, np.flatnonzero(sorted_group[1:] != sorted_group[:-1]) + 1]
+    before -= np.repeat(before[starts], np.diff(np.r_[starts, len(order)]))   # ... within the group
+    taken = np.zeros(len(group))
+    taken[order] = np.clip(amount[sorted_group] - before, 0, room)
+    return taken
+
+def trim_changes(blocks, current, demand, throughput, group):
+    # blocks: {'buy', 'move_in', 'move_out': integer arrays per district}, edited in place.
+    # Cheapens a plan without raising any district's shortfall: drops kits a district does
+    # not need, then covers remaining purchases with spare kits from the same group.
+    buy, move_in, move_out = blocks['buy'], blocks['move_in'], blocks['move_out']
+    n_groups = group.max() + 1
+
+    def kits_needed():
+        kits = current + buy + move_in - move_out
+        short = np.maximum(demand - throughput * kits, 0)
+        return kits, np.where(short > 0, kits, np.maximum(np.ceil(demand / throughput - 1e-9), 0))
+
+    # 1. A district both sending and receiving kits of one type: net the two
+    both = np.minimum(move_in, move_out)
+    move_in -= both
+    move_out -= both
+
+    # 2. Kits above what the district needs (bought first, then moved in); the senders
+    #    keep as many kits as their group stopped receiving
+    kits, need = kits_needed()
+    excess = np.maximum(kits - need, 0)
+    cut = np.minimum(buy, excess)
+    buy -= cut
+    cut = np.minimum(move_in, excess - cut)
+    move_in -= cut
+    move_out -= _share_out(np.bincount(group, weights=cut, minlength=n_groups), move_out, group)
+
+    # 3. Purchases a spare kit in the same group could cover become (cheaper) moves
+    kits, need = kits_needed()
+    spare = np.maximum(kits - need, 0)
+    swap = np.minimum(np.bincount(group, weights=buy, minlength=n_groups),
+                      np.bincount(group, weights=spare, minlength=n_groups))
+    covered = _share_out(swap, buy, group)
+    buy -= covered
+    move_in += covered
+    move_out += _share_out(swap, spare, group)
+    return blocks
+
+def optimize_allocation(df, days, inventory=None, budget=50.0, cross_state=False,
+                        state_budget=None, integer=True, time_limit=None, gap=0.02):
+    # Lexicographic: (1) least unserved demand, (2) the cheapest plan reaching it. Keeping
+    # the two objectives apart stops the solver from chasing change penalties.
+    print(f"\n[Optimization] Solving National Kit Allocation (budget Rs. {budget:.1f} lakh)...")
+    start_time = time.perf_counter()
+    df = df.reset_index(drop=True)
+    n = len(df)
+    inputs = allocation_inputs(df, days)
+    if inventory is None:
+        inventory = baseline_kits(df['state'], district_totals(df), days)
+    state_codes, states = pd.factorize(df['state'])
+
+    n_blocks = len(BLOCKS)
+    n_vars = len(KIT_TYPES) * n_blocks * n
+    def var(kit_i, block):
+        base = (kit_i * n_blocks + BLOCKS.index(block)) * n
+        return np.arange(base, base + n)
+
+    shortfall_cost = np.zeros(n_vars)
+    spend_cost = np.zeros(n_vars)
+    lower = np.zeros(n_vars)
+    upper = np.full(n_vars, np.inf)
+    rows, cols, vals, lo, hi = [], [], [], [], []
+    row = 0
+
+    def add_rows(r_idx, c_idx, v, r_lo, r_hi, n_rows):
+        nonlocal row
+        rows.append(np.asarray(r_idx) + row)
+        cols.append(np.asarray(c_idx))
+        vals.append(np.broadcast_to(np.asarray(v, dtype=float), np.shape(c_idx)))
+        lo.append(np.broadcast_to(np.asarray(r_lo, dtype=float), (n_rows,)))
+        hi.append(np.broadcast_to(np.asarray(r_hi, dtype=float), (n_rows,)))
+        row += n_rows
+
+    d = np.arange(n)
+    for k, kit in enumerate(KIT_TYPES):
+        demand, throughput = inputs[kit]
+        current = np.asarray(inventory[kit], dtype=float)
+
+        # Objectives: unserved transactions per day; Rs. lakh spent on purchases and moves
+        shortfall_cost[var(k, 'short')] = 1.0
+        spend_cost[var(k, 'buy')] = KIT_COST[kit]
+        spend_cost[var(k, 'move_in')] = MOVE_COST[kit]
+        upper[var(k, 'move_out')] = current
+
+        # 1. Kit balance: kits = current + bought + moved in - moved out
+        add_rows(np.tile(d, 4),
+                 np.concatenate([var(k, 'kits'), var(k, 'buy'), var(k, 'move_in'), var(k, 'move_out')]),
+                 np.repeat([1.0, -1.0, -1.0, 1.0], n), current, current, n)
+        # 2. Shortfall: short >= demand - throughput * kits
+        add_rows(np.tile(d, 2), np.concatenate([var(k, 'kits'), var(k, 'short')]),
+                 np.concatenate([throughput, np.ones(n)]), demand, np.inf, n)
+
+    # 4. National budget over purchases and moves
+    spend_cols = np.flatnonzero(spend_cost)
+    spend_vals = spend_cost[spend_cols]
+    add_rows(np.zeros(len(spend_cols), dtype=int), spend_cols, spend_vals, -np.inf, budget, 1)
+
+    # 5. Optional per-state spending caps {state: lakh}
+    if state_budget:
+        district_of = spend_cols % n
+        for s in [s for s in states if s in state_budget]:
+            mask = state_codes[district_of] == states.get_loc(s)
+            add_rows(np.zeros(mask.sum(), dtype=int), spend_cols[mask], spend_vals[mask],
+                     -np.inf, state_budget[s], 1)
+
+    common = sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                               shape=(row, n_vars))
+    integrality = np.zeros(n_vars)
+    if integer:
+        for k in range(len(KIT_TYPES)):
+            for block in ['kits', 'buy', 'move_in', 'move_out']:
+                integrality[var(k, block)] = 1
+    if time_limit is None:
+        time_limit = max(TIME_LIMIT_FLOOR, n_vars / 1000 * SECONDS_PER_1K_VARS)
+    deadline = start_time + time_limit
+    short_cols = np.flatnonzero(shortfall_cost)
+
+    def solve(cross):
+        # 3. Redeployment only moves existing kits: within each state, or nationally
+        group = np.zeros(n, dtype=int) if cross else state_codes
+        n_groups = 1 if cross else len(states)
+        move = sparse.csr_matrix((
+            np.tile(np.repeat([1.0, -1.0], n), len(KIT_TYPES)),
+            (np.concatenate([np.tile(group, 2) + k * n_groups for k in range(len(KIT_TYPES))]),
+             np.concatenate([np.concatenate([var(k, 'move_in'), var(k, 'move_out')]) for k in range(len(KIT_TYPES))]))),
+            shape=(len(KIT_TYPES) * n_groups, n_vars))
+        A = sparse.vstack([common, move], format='csr')
+        return milp(shortfall_cost, constraints=LinearConstraint(A, np.concatenate(lo + [np.zeros(A.shape[0] - row)]),
+                                                                 np.concatenate(hi + [np.zeros(A.shape[0] - row)])),
+                    integrality=integrality, bounds=Bounds(lower, upper),
+                    options={'time_limit': max(deadline - time.perf_counter(), MIN_SOLVE_SECONDS),
+                             'mip_rel_gap': gap})
+
+    # Stage 1: least unserved demand. The within-state plan is feasible nationally too, so it
+    # is solved first and stands as the incumbent: the cross-state solve (a relaxation) gets
+    # the remaining time, runs only while demand is still unserved, and is kept if it does better.
+    within = requested = result = solve(False)
+    if within.x is None:
+        raise RuntimeError(f"Allocation solver failed: {within.message}")
+    skipped = cross_state and within.fun <= SHORTFALL_TOLERANCE
+    if cross_state and not skipped:
+        requested = solve(True)
+        if requested.x is not None and requested.fun < within.fun:
+            result = requested
+    cross_used = result is not within
+    # Gap of the chosen plan against the best bound of the problem actually asked for
+    bound = getattr(requested, 'mip_dual_bound', None)
+    mip_gap = (result.fun - bound) / max(abs(result.fun), 1.0) if bound is not None and np.isfinite(bound) else np.nan
+
+    # Stage 2: cheapest plan with that shortfall, by dropping the changes that serve nothing
+    x = np.round(result.x)
+    group = np.zeros(n, dtype=int) if cross_used else state_codes
+    for k, kit in enumerate(KIT_TYPES):
+        demand, throughput = inputs[kit]
+        blocks = {b: x[var(k, b)] for b in ['buy', 'move_in', 'move_out']}
+        trim_changes(blocks, np.asarray(inventory[kit], dtype=float), demand, throughput, group)
+        for b, values in blocks.items():
+            x[var(k, b)] = values
+        x[var(k, 'kits')] = inventory[kit] + blocks['buy'] + blocks['move_in'] - blocks['move_out']
+
+    # 6. Redeployment plan, one row per district
+    plan = df[['state', 'district']].copy()
+    summary = {'status': requested.message,
+               'optimal': requested.status == 0 or result.fun <= SHORTFALL_TOLERANCE,
+               'mip_gap': float(max(mip_gap, 0)) if np.isfinite(mip_gap) else np.nan,
+               'kept_within_state': cross_state and not cross_used, 'cross_state_skipped': skipped,
+               'time_limit': time_limit, 'solve_seconds': None}
+    for k, kit in enumerate(KIT_TYPES):
+        demand, throughput = inputs[kit]
+        plan[f'{kit}_Kits_Now'] = inventory[kit]
+        plan[f'{kit}_Kits_Plan'] = np.round(x[var(k, 'kits')]).astype(int)
+        plan[f'{kit}_Buy'] = np.round(x[var(k, 'buy')]).astype(int)
+        plan[f'{kit}_Move'] = np.round(x[var(k, 'move_in')] - x[var(k, 'move_out')]).astype(int)
+        plan[f'{kit}_Unserved_Now'] = np.clip(demand - throughput * plan[f'{kit}_Kits_Now'], 0, None)
+        plan[f'{kit}_Unserved_Plan'] = np.clip(demand - throughput * plan[f'{kit}_Kits_Plan'], 0, None)
+        summary[f'{kit}_Bought'] = int(plan[f'{kit}_Buy'].sum())
+        summary[f'{kit}_Moved'] = int(plan[f'{kit}_Move'].clip(lower=0).sum())
+        summary[f'{kit}_Unserved_Now'] = float(plan[f'{kit}_Unserved_Now'].sum())
+        summary[f'{kit}_Unserved_Plan'] = float(plan[f'{kit}_Unserved_Plan'].sum())
+    summary['Spend'] = float(sum(summary[f'{kit}_Bought'] * KIT_COST[kit] + summary[f'{kit}_Moved'] * MOVE_COST[kit]
+                                 for kit in KIT_TYPES))
+    summary['solve_seconds'] = time.perf_counter() - start_time
+    print(f"   -> Solved {n_vars} variables in {summary['solve_seconds']:.2f}s, spend Rs. {summary['Spend']:.1f} lakh"
+          f" ({'optimal' if summary['optimal'] else 'time limit'}, gap {summary['mip_gap']:.1%})")
+    if skipped:
+        print("   -> Within-state moves already serve all demand; cross-state solve skipped")
+    elif summary['kept_within_state']:
+        print("   -> Cross-state solve found no better plan; kept the within-state plan")
+    return plan, summary
+
+def export_allocation_plan(plan, filename='aadhaar_kit_allocation_plan.csv'):
+    plan.to_csv(filename, index=False)
+    print(f"   -> Saved redeployment plan to '{filename}'")
+    return plan
@@ -0,0 +1,156 @@
+import pandas as pd
+import numpy as np
+import os
+import warnings
+
+from uidai_store import atomic_write
+
+# ==========================================
+# STREAMING ANOMALY ENGINE (DISTRICT-MONTH SERIES)
+# ==========================================
+# Metrics scored every month, derived from the monthly trends columns
+ANOMALY_METRICS = ['Enrol_Total', 'Demo_Total', 'Bio_Total', 'Adult_Entry_Rate']
+
+MAD_SCALE = 0.6745  # Makes MAD-based z comparable to a normal z-score
+# Floor on the MAD so flat baselines (e.g. months of zero enrolments) don't divide by zero
+MIN_SPREAD = np.array([1.0, 1.0, 1.0, 0.01])
+
+def monthly_metric_frame(month_df):
+    # One month of aadhaar_monthly_district_trends rows -> (state, district) x metrics
+    df = month_df.groupby(['state', 'district']).sum(numeric_only=True)
+    out = pd.DataFrame(index=df.index)
+    out['Enrol_Total'] = df['Enrol_age_0_5'] + df['Enrol_age_5_17'] + df['Enrol_age_18_greater']
+    out['Demo_Total'] = df['Demo_demo_age_5_17'] + df['Demo_demo_age_17_']
+    out['Bio_Total'] = df['Bio_bio_age_5_17'] + df['Bio_bio_age_17_']
+    out['Adult_Entry_Rate'] = df['Enrol_age_18_greater'] / (out['Enrol_Total'] + 1)
+    return out
+
+def init_anomaly_state(window=12, min_history=3):
+    # Running statistics: a fixed-width ring of the last `window` months per district,
+    # so every update and every median is O(districts) regardless of history length
+    return {
+        'keys': pd.MultiIndex.from_tuples([], names=['state', 'district']),
+        'history': np.full((0, window, len(ANOMALY_METRICS)), np.nan),
+        'pos': 0,
+        'window': window,
+        'min_history': min_history,
+        'months': [],
+    }
+
+def _grow_state(state, index):
+    # Register districts seen for the first time (empty history)
+    new_keys = index.difference(state['keys'])
+    if len(new_keys):
+        pad = np.full((len(new_keys), state['window'], len(ANOMALY_METRICS)), np.nan)
+        state['keys'] = state['keys'].append(new_keys)
+        state['history'] = np.concatenate([state['history'], pad], axis=0)
+    return state
+
+def _robust_z(x, med, mad):
+    return MAD_SCALE * (x - med) / np.maximum(mad, MIN_SPREAD)
+
+def score_month(state, month_df, threshold=3.5, commit=True):
+    # commit=False scores the month without adding it to the history (a month still loading)
+    year_month = month_df['YearMonth'].iloc[0]
+    current = monthly_metric_frame(month_df)
+    state = _grow_state(state, current.index)
+
+    # 1. Current month aligned to the state's district axis (absent = no activity)
+    x = current.reindex(state['keys']).fillna(0).to_numpy()
+
+    # 2. Within-district: median/MAD of the district's own recent history
+    hist = state['history']
+    n_hist = np.sum(~np.isnan(hist[:, :, 0]), axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN rows for new districts
+        med_self = np.nanmedian(hist, axis=1)
+        mad_self = np.nanmedian(np.abs(hist - med_self[:, None, :]), axis=1)
+        z_self = _robust_z(x, med_self, mad_self)
+    z_self[n_hist < state['min_history']] = np.nan
+
+    # 3. Within-state: median/MAD across the state's districts this month
+    cur = pd.DataFrame(x, index=state['keys'], columns=ANOMALY_METRICS)
+    by_state = cur.groupby(level='state')
+    med_state = by_state.transform('median')
+    mad_state = (cur - med_state).abs().groupby(level='state').transform('median')
+    z_state = _robust_z(x, med_state.to_numpy(), mad_state.to_numpy())
+
+    # 4. Alerts: any metric beyond the threshold on either baseline
+    flagged = (np.abs(np.nan_to_num(z_self)) >= threshold) | (np.abs(z_state) >= threshold)
+    d_idx, m_idx = np.nonzero(flagged)
+    alerts = pd.DataFrame({
+        'YearMonth': year_month,
+        'state': state['keys'].get_level_values('state')[d_idx],
+        'district': state['keys'].get_level_values('district')[d_idx],
+        'Metric': np.array(ANOMALY_METRICS)[m_idx],
+        'Value': x[d_idx, m_idx],
+        'Z_State': z_state[d_idx, m_idx],
+        'Z_Self': z_self[d_idx, m_idx],
+    })
+
+    # 5. Push the month into the ring buffer
+    if not commit:
+        return state, alerts
+    state['history'][:, state['pos'], :] = x
+    state['pos'] = (state['pos'] + 1) % state['window']
+    state['months'].append(year_month)
+    return state, alerts
+
+def save_anomaly_state(state, filename='aadhaar_anomaly_state.npz'):
+    keys = state['keys'].to_frame(index=False)
+    np.savez(
+        filename,
+        states=keys['state'].to_numpy(dtype=str), districts=keys['district'].to_numpy(dtype=str),
+        history=state['history'], pos=state['pos'], window=state['window'],
+        min_history=state['min_history'], months=np.array(state['months'], dtype=str),
+    )
+
+def load_anomaly_state(filename='aadhaar_anomaly_state.npz'):
+    data = np.load(filename)
+    return {
+        'keys': pd.MultiIndex.from_arrays([data['states'], data['districts']], names=['state', 'district']),
+        'history': data['history'],
+        'pos': int(data['pos']),
+        'window': int(data['window']),
+        'min_history': int(data['min_history']),
+        'months': list(data['months']),
+    }
+
+def load_anomaly_alerts(alerts_file='aadhaar_anomaly_alerts.csv'):
+    if not os.path.exists(alerts_file):
+        return pd.DataFrame()
+    return pd.read_csv(alerts_file, dtype={'YearMonth': str})
+
+def run_anomaly_engine(monthly_df, state_file='aadhaar_anomaly_state.npz',
+                       alerts_file='aadhaar_anomaly_alerts.csv', threshold=3.5):
+    print("\n[Analysis] Scoring District-Month Anomalies (Robust Z, State & Own History)...")
+
+    # Resume from saved running statistics; `months` only holds complete months. The latest
+    # month in the data may still be loading, so it is rescored on every run and only
+    # enters the history once a later month exists.
+    if os.path.exists(state_file):
+        state = load_anomaly_state(state_file)
+    else:
+        state = init_anomaly_state()
+    last = state['months'][-1] if state['months'] else ''
+    new_months = sorted(m for m in monthly_df['YearMonth'].unique() if m > last)
+    if not new_months:
+        print("   -> No months after the scored history")
+        return load_anomaly_alerts(alerts_file)
+
+    all_alerts = []
+    for ym in new_months:
+        complete = ym != new_months[-1]
+        state, alerts = score_month(state, monthly_df[monthly_df['YearMonth'] == ym], threshold, commit=complete)
+        all_alerts.append(alerts)
+        print(f"   -> {ym}: {len(alerts)} alerts" + ('' if complete else ' (latest month, provisional)'))
+
+    # Replace the rescored months in the stored alerts table, keep the older ones
+    alerts = pd.concat(all_alerts, ignore_index=True)
+    stored = load_anomaly_alerts(alerts_file)
+    if not stored.empty:
+        alerts = pd.concat([stored[~stored['YearMonth'].isin(new_months)], alerts], ignore_index=True)
+    atomic_write(alerts_file, lambda path: alerts.to_csv(path, index=False))
+    save_anomaly_state(state, state_file)
+    print(f"   -> Saved {len(alerts)} alerts to '{alerts_file}'")
+    return alerts
@@ -0,0 +1,325 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import itertools
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from uidai_store import (load_district_table, open_monthly_store, monthly_slice, artifact_version, HotReloader,
+                         DISTRICT_CSV, DISTRICT_ARROW, MONTHLY_CSV, MONTHLY_ARROW)
+from uidai_ranking import load_rank_index, top_districts, district_rank, RANK_METRICS
+from uidai_hierarchy import load_rollup, rollup_level, ROLLUP_FILE
+from uidai_export import bulk_export, export_formats, EXPORT_FORMATS
+
+# ==========================================
+# READ-ONLY JSON API OVER THE PIPELINE OUTPUTS
+# ==========================================
+# python uidai_api.py [data_dir] [port]
+#
+#   GET /api/version
+#   GET /api/states                              state rollups (uidai_hierarchy)
+#   GET /api/states/<state>                      rollup + its districts
+#   GET /api/districts?state=<state>             district metrics
+#   GET /api/districts/<state>/<district>        metrics + ranks
+#   GET /api/districts/<state>/<district>/monthly
+#   GET /api/clusters                            cluster sizes and centroids
+#   GET /api/export/<csv|parquet|zip>?content=districts|monthly&state=<state>&district=<state>/<district>
+#                                                streamed bulk export (chunked, not cached); state and
+#                                                district may repeat, neither = every district
+#   GET /api/rankings/<metric>?level=district|state&n=10
+#                                                state rows say how their value was aggregated:
+#                                                'rollup' (same figure as /api/states) or a
+#                                                'median'/'sum' of districts for metrics it lacks
+#
+# Responses are cached (LRU) per data version; the ETag is the version plus the URL,
+# so clients revalidate for free until the pipeline rewrites an artifact.
+API_PORT = 8502
+API_CACHE_SIZE = 2048
+EXPORT_PATH = '/api/export/'
+RANK_FILE = 'aadhaar_rank_index.npz'
+CLUSTER_FEATURES = ['UER_Score', 'Catch_Up_Index', 'Adult_Entry_Rate', 'CV_Volatility']
+
+def data_version(directory='.'):
+    # Fingerprint of the artifacts the API serves
+    return artifact_version(directory, [DISTRICT_ARROW, DISTRICT_CSV, MONTHLY_ARROW, MONTHLY_CSV, RANK_FILE,
+                                        ROLLUP_FILE])
+
+def load_api_data(directory='.'):
+    df = load_district_table(directory)
+    monthly_source, monthly_ranges = open_monthly_store(directory)
+    ranks = load_rank_index(os.path.join(directory, RANK_FILE))
+    rollup = load_rollup(os.path.join(directory, ROLLUP_FILE))
+    states = None if rollup is None else rollup_level(rollup, 'state').drop(columns=['Level', 'district'])
+    return {
+        'version': data_version(directory),
+        'districts': df,
+        'row_pos': {key: i for i, key in enumerate(zip(df['state'], df['district']))},
+        'state_rows': df.groupby('state', sort=True).indices,
+        'ranks': ranks,
+        'rank_pos': {} if ranks is None else {key: i for i, key in enumerate(zip(ranks['state'], ranks['district']))},
+        # State aggregates and their district lists both come from the one rollup file
+        'states': None if states is None else states.reset_index(),
+        'state_pos': {} if states is None else {state: i for i, state in enumerate(states.index)},
+        'state_districts': {} if rollup is None else
+            rollup_level(rollup, 'district').groupby('state')['district'].apply(sorted).to_dict(),
+        'monthly_source': monthly_source,
+        'monthly_ranges': monthly_ranges,
+    }
+
+def _records(frame):
+    # NaN -> null, numpy scalars -> JSON numbers
+    return json.loads(frame.to_json(orient='records', double_precision=6))
+
+def _rank_row(data, key):
+    pos = data['rank_pos'].get(key)
+    if pos is None:
+        return None
+    return {str(m): district_rank(data['ranks'], pos, m) for m in data['ranks']['metrics']}
+
+def route(data, path, query):
+    # Pure request -> (status, payload) mapping; all lookups are dict/array indexing
+    parts = [unquote(p) for p in path.strip('/').split('/')]
+    if parts[:1] != ['api']:
+        return 404, {'error': 'not found'}
+    parts = parts[1:]
+    df, ranks = data['districts'], data['ranks']
+
+    if parts == ['version']:
+        return 200, {'version': data['version'], 'districts': len(df)}
+
+    if parts[:1] == ['states']:
+        states = data['states']
+        if states is None:
+            return 503, {'error': 'state rollup not available'}
+        if len(parts) == 1:
+            return 200, _records(states)
+        if len(parts) > 2:
+            return 404, {'error': 'not found'}
+        pos = data['state_pos'].get(parts[1])
+        if pos is None:
+            return 404, {'error': f"unknown state '{parts[1]}'"}
+        return 200, {'state': _records(states.iloc[[pos]])[0],
+                     'districts': data['state_districts'].get(parts[1], [])}
+
+    if parts[:1] == ['districts']:
+        if len(parts) == 1:
+            state = query.get('state')
+            if state is None:
+                return 200, _records(df)
+            if state not in data['state_rows']:
+                return 404, {'error': f"unknown state '{state}'"}
+            return 200, _records(df.iloc[data['state_rows'][state]])
+        pos = data['row_pos'].get(tuple(parts[1:3]))
+        if pos is None:
+            return 404, {'error': f"unknown district '{'/'.join(parts[1:3])}'"}
+        state, district = parts[1], parts[2]
+        if len(parts) == 3:
+            return 200, {'metrics': _records(df.iloc[[pos]])[0],
+                         'ranks': _rank_row(data, (state, district))}
+        if parts[3:] == ['monthly']:
+            return 200, _records(monthly_slice(data['monthly_source'], data['monthly_ranges'], state, district))
+
+    if parts == ['clusters']:
+        if 'Cluster_ID' not in df.columns:
+            return 503, {'error': 'cluster labels not available'}
+        profile = df.groupby('Cluster_ID')[CLUSTER_FEATURES].mean()
+        profile.insert(0, 'Districts', df['Cluster_ID'].value_counts().sort_index())
+        return 200, _records(profile.reset_index())
+
+    if parts[:1] == ['rankings'] and len(parts) == 2:
+        if ranks is None:
+            return 503, {'error': 'ranking index not available'}
+        metric = parts[1]
+        if metric not in ranks['metrics']:
+            return 404, {'error': f"unknown metric '{metric}'", 'metrics': [str(m) for m in ranks['metrics']]}
+        try:
+            n = max(int(query.get('n', 10)), 1)
+        except ValueError:
+            return 400, {'error': 'n must be an integer'}
+        j = int(np.flatnonzero(ranks['metrics'] == metric)[0])
+        if query.get('level', 'district') == 'state':
+            pos = ranks['state_top'][:n, j] if n <= len(ranks['state_top']) else \
+                np.argsort(ranks['state_rank'][:, j], kind='stable')[:n]
+            # 'rollup': the state's own figure (as /api/states serves it); 'median'/'sum': of its districts
+            agg = str(ranks['state_agg'][j]) if 'state_agg' in ranks else RANK_METRICS.get(metric, 'median')
+            return 200, [{'rank': i + 1, 'state': str(ranks['states'][p]), 'value': float(ranks['state_values'][p, j]),
+                          'aggregate': agg} for i, p in enumerate(pos)]
+        pos = top_districts(ranks, metric, n) if n <= len(ranks['top']) else \
+            np.argsort(ranks['nat_rank'][:, j], kind='stable')[:n]
+        return 200, [{'rank': i + 1, 'state': str(ranks['state'][p]), 'district': str(ranks['district'][p]),
+                      'value': float(ranks['values'][p, j])} for i, p in enumerate(pos)]
+
+    return 404, {'error': 'not found'}
+
+def plan_export(data, ext, query):
+    # -> (status, error payload) or (200, (format, content, positions)); query values are lists
+    formats = {EXPORT_FORMATS[f][0]: f for f in export_formats()}
+    if ext not in formats:
+        return 404, {'error': f"unknown export format '{ext}'", 'formats': sorted(formats)}
+    content = query.get('content', ['districts'])[-1]
+    if content not in ('districts', 'monthly'):
+        return 400, {'error': "content must be 'districts' or 'monthly'"}
+    states, districts = query.get('state', []), query.get('district', [])
+    if not states and not districts:
+        return 200, (formats[ext], content, np.arange(len(data['districts'])))
+    positions = []
+    for state in states:
+        if state not in data['state_rows']:
+            return 404, {'error': f"unknown state '{state}'"}
+        positions.append(data['state_rows'][state])
+    for key in districts:
+        pos = data['row_pos'].get(tuple(key.split('/', 1)))
+        if pos is None:
+            return 404, {'error': f"unknown district '{key}'"}
+        positions.append([pos])
+    return 200, (formats[ext], content, np.unique(np.concatenate(positions)).astype(int))
+
+class ResponseCache:
+    # LRU of encoded responses; the key carries the data version, so stale entries
+    # are never served and simply age out
+    def __init__(self, size=API_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+class DistrictAPI:
+    # Serves the current data snapshot; a newer artifact version is loaded in the
+    # background and swapped in whole (see HotReloader)
+    def __init__(self, directory='.', cache_size=API_CACHE_SIZE):
+        self.source = HotReloader(lambda: load_api_data(directory), lambda: data_version(directory))
+        self.cache = ResponseCache(cache_size)
+
+    def respond(self, target):
+        # -> (status, body bytes, etag)
+        data = self.source.get()[1]
+        key = (data['version'], target)
+        entry = self.cache.get(key)
+        if entry is None:
+            url = urlsplit(target)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            status, payload = route(data, url.path, query)
+            body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+            etag = f'"{data["version"]}-{hashlib.sha1(target.encode()).hexdigest()[:12]}"'
+            entry = (status, body, etag)
+            self.cache.put(key, entry)
+        return entry
+
+    def export(self, target):
+        # -> (status, headers, body chunks); exports are streamed and never cached
+        data = self.source.get()[1]
+        url = urlsplit(target)
+        status, plan = plan_export(data, url.path[len(EXPORT_PATH):], parse_qs(url.query))
+        if status != 200:
+            return status, {'Content-Type': 'application/json; charset=utf-8'}, \
+                [json.dumps(plan, separators=(',', ':')).encode('utf-8')]
+        fmt, content, positions = plan
+        ext, mime = EXPORT_FORMATS[fmt]
+        headers = {'Content-Type': mime,
+                   'Content-Disposition': f'attachment; filename="Aadhaar_export.{ext}"'}
+        return 200, headers, bulk_export(data['districts'], positions, data['monthly_source'],
+                                         data['monthly_ranges'], fmt, content)
+
+class _Handler(BaseHTTPRequestHandler):
+    api = None
+    protocol_version = 'HTTP/1.1'   # Keep-alive: one connection serves many requests
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def do_GET(self):
+        if self.path.startswith(EXPORT_PATH):
+            self.send_export()
+            return
+        try:
+            status, body, etag = self.api.respond(self.path)
+        except Exception as e:
+            # Never cached (respond only stores routed responses), so the next request retries
+            self.send_error_json(e)
+            return
+        if status == 200 and etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')   # Always revalidate via the ETag
+        if status == 200:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, error):
+        print(f"[API] {self.path} failed: {type(error).__name__}: {error}", file=sys.stderr)
+        body = json.dumps({'error': 'internal server error'}).encode('utf-8')
+        self.send_response(500)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_export(self):
+        # Chunked transfer encoding: each piece bulk_export yields goes out as it is encoded
+        try:
+            status, headers, chunks = self.api.export(self.path)
+            chunks = iter(chunks)
+            first = next(chunks, b'')     # Most failures (bad data, missing columns) surface here
+        except Exception as e:
+            self.send_error_json(e)
+            return
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for chunk in itertools.chain([first], chunks):
+                if chunk:
+                    self.wfile.write(b'%X\r\n%s\r\n' % (len(chunk), chunk))
+        except Exception as e:
+            # Headers are out: drop the connection without the final chunk so the client sees a
+            # truncated transfer rather than a complete-looking file
+            print(f"[API] {self.path} failed mid-stream: {type(e).__name__}: {e}", file=sys.stderr)
+            self.close_connection = True
+            return
+        self.wfile.write(b'0\r\n\r\n')
+
+    def log_message(self, format, *args):
+        pass  # Per-request logging costs more than the cached response itself
+
+def make_server(directory='.', host='127.0.0.1', port=API_PORT, cache_size=API_CACHE_SIZE):
+    # port=0 picks a free port (server.server_address[1]); run with server.serve_forever()
+    handler = type('DistrictAPIHandler', (_Handler,), {'api': DistrictAPI(directory, cache_size)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == "__main__":
+    server = make_server(sys.argv[1] if len(sys.argv) > 1 else '.',
+                         port=int(sys.argv[2]) if len(sys.argv) > 2 else API_PORT)
+    print(f"Serving district analytics on http://{server.server_address[0]}:{server.server_address[1]}/api/version")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,93 @@
+import pandas as pd
+import json
+import os
+import subprocess
+import sys
+
+# ==========================================
+# DASHBOARD LOAD BENCHMARK (COLD START & MEMORY)
+# ==========================================
+# Each run is a fresh interpreter, like a new Streamlit server process.
+# python uidai_bench.py [data_dir] [runs]
+HEAVY_MODULES = ['sklearn', 'scipy.optimize', 'pyarrow.parquet', 'uidai_allocation', 'uidai_query']
+
+_CHILD = r"""
+import json, pickle, sys, time
+start = time.perf_counter()
+import pandas as pd
+from uidai_store import load_district_table, APP_COLUMNS
+imported = time.perf_counter()
+df = load_district_table(sys.argv[1], APP_COLUMNS, prefer=sys.argv[2])
+loaded = time.perf_counter()
+
+mem = {}                                             # Read before anything else allocates
+try:
+    with open('/proc/self/smaps_rollup') as f:       # Linux only
+        for line in f:
+            key, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                mem[key] = int(rest.split()[0]) / 1024
+except OSError:
+    pass
+print(json.dumps({
+    'Import_s': imported - start,
+    'Load_s': loaded - imported,
+    'Rows': len(df),
+    'Frame_MB': df.memory_usage(deep=True).sum() / 2**20,
+    'RSS_MB': mem.get('Rss'),
+    'Dirty_MB': (mem['Private_Dirty'] + mem['Shared_Dirty']) if mem else None,   # Per-process heap
+    'Clean_MB': (mem['Private_Clean'] + mem['Shared_Clean']) if mem else None,   # Page cache, shareable
+    'Session_Copy_MB': len(pickle.dumps(df)) / 2**20,   # What st.cache_data would copy per session
+}))
+"""
+
+# First paint: the app's first script run (the default citizen view) in a fresh
+# interpreter, imports included, through Streamlit's headless test runner
+_FIRST_PAINT_CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.run()
+painted = time.perf_counter()
+print(json.dumps({
+    'Streamlit_Import_s': ready - start,
+    'First_Paint_s': painted - ready,
+    'Errors': len(at.exception),
+    'Heavy_Loaded': ','.join(m for m in json.loads(sys.argv[2]) if m in sys.modules) or '-',
+}))
+"""
+
+def benchmark_first_paint(app_file='app.py', runs=3):
+    print(f"\n[Benchmark] Dashboard Time to First Paint ({runs} cold starts)...")
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for run in range(runs):
+        out = subprocess.run([sys.executable, '-c', _FIRST_PAINT_CHILD, os.path.abspath(app_file),
+                              json.dumps(HEAVY_MODULES)], cwd=here, capture_output=True, text=True, check=True)
+        results.append({'Run': run + 1, **json.loads(out.stdout.strip().splitlines()[-1])})
+
+    report = pd.DataFrame(results)
+    print(report.round(3).to_string(index=False))
+    return report
+
+def benchmark_loading(directory='.', runs=3):
+    print(f"\n[Benchmark] Dashboard Data Load ({runs} cold starts per format)...")
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for fmt in ['csv', 'arrow']:
+        for run in range(runs):
+            out = subprocess.run([sys.executable, '-c', _CHILD, directory, fmt], cwd=here,
+                                 capture_output=True, text=True, check=True)
+            results.append({'Format': fmt, 'Run': run + 1, **json.loads(out.stdout.strip().splitlines()[-1])})
+
+    report = pd.DataFrame(results).groupby('Format', sort=False).median(numeric_only=True).drop(columns='Run')
+    print(report.round(3).to_string())
+    return report
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    benchmark_loading(data_dir, runs)
+    benchmark_first_paint(os.path.join(data_dir, 'app.py'), runs)
@@ -0,0 +1,78 @@
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from uidai_cube import cube_measure
+
+# ==========================================
+# ENROLMENT CAMP DETECTION (BURSTS ON THE DAILY CUBE)
+# ==========================================
+def rolling_baseline(series, window=29):
+    # Centred rolling median for every district at once -> (districts x days)
+    half = window // 2
+    padded = np.pad(series, ((0, 0), (half, half)), mode='reflect')
+    return np.median(sliding_window_view(padded, window, axis=1), axis=2)
+
+def detect_camps(cube, measure='age_5_17', window=29, ratio=3.0, z=4.0,
+                 min_volume=20, max_gap=1):
+    print(f"\n[Analysis] Detecting Enrolment Camps on Daily '{measure}' Series...")
+    x = cube_measure(cube, measure)
+    n_dist, n_days = x.shape
+    baseline = rolling_baseline(x, window)
+
+    # 1. Burst days: well above the local baseline in both relative and Poisson terms
+    burst = (x >= min_volume) & (x > ratio * baseline) & (x > baseline + z * np.sqrt(baseline + 1))
+
+    # 2. Run boundaries for all districts in one diff
+    edges = np.diff(np.pad(burst.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    d_start, t_start = np.nonzero(edges == 1)
+    d_end, t_end = np.nonzero(edges == -1)   # exclusive end, same row-major order as starts
+
+    # 3. Bridge short gaps: a run joins the previous one in its district when at most
+    #    max_gap quiet days separate them, so a camp with a quiet day or two stays one event
+    joined = (d_start[1:] == d_end[:-1]) & (t_start[1:] - t_end[:-1] <= max_gap)
+    first = np.ones(len(d_start), dtype=bool)
+    last = np.ones(len(d_end), dtype=bool)
+    first[1:] = ~joined
+    last[:-1] = ~joined
+    d_start, t_start, d_end, t_end = d_start[first], t_start[first], d_end[last], t_end[last]
+
+    # 4. Volume, excess and peak per run via cumulative sums / reduceat
+    excess = np.clip(x - baseline, 0, None)
+    cs_vol = np.pad(np.cumsum(x, axis=1), ((0, 0), (1, 0)))
+    cs_exc = np.pad(np.cumsum(excess, axis=1), ((0, 0), (1, 0)))
+    flat = np.append(x.ravel(), 0)
+    bounds = np.column_stack([d_start * n_days + t_start, d_end * n_days + t_end]).ravel()
+    peaks = np.maximum.reduceat(flat, bounds)[::2] if len(bounds) else np.array([])
+
+    keys = cube['keys']
+    dates = cube['dates']
+    calendar = pd.DataFrame({
+        'state': keys['state'].to_numpy()[d_start],
+        'district': keys['district'].to_numpy()[d_start],
+        'Start': dates[t_start],
+        'End': dates[t_end - 1],
+        'Days': t_end - t_start,
+        'Volume': cs_vol[d_start, t_end] - cs_vol[d_start, t_start],
+        'Excess_Volume': cs_exc[d_start, t_end] - cs_exc[d_start, t_start],
+        'Peak_Day_Volume': peaks,
+    })
+    print(f"   -> Found {len(calendar)} camp events in {calendar['district'].nunique()} of {n_dist} districts")
+    return calendar
+
+def summarize_camps(calendar, cube, measure='age_5_17'):
+    # Per-district roll-up: how much of the series is camp-driven
+    totals = pd.Series(cube_measure(cube, measure).sum(axis=1),
+                       index=pd.MultiIndex.from_frame(cube['keys']), name='Total_Volume')
+    summary = calendar.groupby(['state', 'district']).agg(
+        Camp_Count=('Start', 'size'),
+        Camp_Days=('Days', 'sum'),
+        Camp_Excess=('Excess_Volume', 'sum'),
+    )
+    summary = summary.join(totals, how='left')
+    summary['Camp_Share'] = summary['Camp_Excess'] / (summary['Total_Volume'] + 1)
+    return summary
+
+def export_camp_calendar(calendar, filename='aadhaar_camp_calendar.csv'):
+    calendar.to_csv(filename, index=False)
+    print(f"   -> Saved camp calendar to '{filename}'")
+    return calendar
@@ -0,0 +1,160 @@
+import pandas as pd
+import numpy as np
+import os
+import warnings
+from uidai_cube import cube_measure
+
+# ==========================================
+# CENTER CAPACITY MODEL (M/M/c QUEUE, VECTORIZED)
+# ==========================================
+# Average minutes one operator/kit spends per transaction
+SERVICE_MINUTES = {'enrol': 15.0, 'demo': 6.0, 'bio': 12.0}
+OPEN_HOURS = 8.0
+TARGET_UTILIZATION = 0.8
+# Kit types and the work they serve: ECMP kits enrol, UCL laptops handle updates
+KIT_WORK = {'Enrol': ['enrol'], 'Update': ['demo', 'bio']}
+
+DEMAND_COLUMNS = {
+    'enrol': ['age_0_5', 'age_5_17', 'age_18_greater'],
+    'demo': ['demo_age_5_17', 'demo_age_17_'],
+    'bio': ['bio_age_5_17', 'bio_age_17_'],
+}
+
+def demand_from_cube(cube):
+    # Daily transactions per district by work type -> (districts x days) arrays
+    return {kind: cube_measure(cube, cols) for kind, cols in DEMAND_COLUMNS.items()}
+
+def demand_from_profiles(week):
+    # Weekday profile rows (uidai_weekday) -> average daily transactions per weekday
+    weeks = week['Weeks'].clip(lower=1).to_numpy()
+    return {
+        'enrol': week[['Enrol_0_5', 'Enrol_5_17', 'Enrol_18_plus']].sum(axis=1).to_numpy() / weeks,
+        'demo': week[['Demo_5_17', 'Demo_17_plus']].sum(axis=1).to_numpy() / weeks,
+        'bio': week[['Bio_5_17', 'Bio_17_plus']].sum(axis=1).to_numpy() / weeks,
+    }
+
+def erlang_c(offered_load, servers):
+    # Probability an arrival has to wait, for arrays of load a = lambda/mu and server counts c.
+    # Erlang B by its stable recurrence, then converted to Erlang C.
+    a = np.asarray(offered_load, dtype=float)
+    c = np.broadcast_to(np.asarray(servers, dtype=int), a.shape)
+    b = np.ones_like(a)
+    for k in range(1, int(c.max(initial=0)) + 1):
+        b = np.where(k <= c, a * b / (k + a * b), b)
+    rho = a / np.maximum(c, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_wait = b / (1 - rho * (1 - b))
+    return np.where(rho < 1, p_wait, 1.0)
+
+def estimate_wait_times(demand, kits, open_hours=OPEN_HOURS, service_minutes=None):
+    service_minutes = service_minutes or SERVICE_MINUTES
+    volume = sum(demand[k] for k in service_minutes)
+    work_minutes = sum(demand[k] * service_minutes[k] for k in service_minutes)
+
+    # 1. Arrival rate per hour and per-kit service rate from the day's work mix
+    arrival_rate = volume / open_hours
+    mean_service = np.where(volume > 0, work_minutes / np.maximum(volume, 1e-9), 1.0)
+    service_rate = 60.0 / mean_service
+
+    kits = np.asarray(kits, dtype=int)
+    if kits.ndim == 1 and arrival_rate.ndim == 2:
+        kits = kits[:, None]            # One kit count per district, every day
+    kits = np.broadcast_to(np.maximum(kits, 0), arrival_rate.shape)
+
+    # 2. M/M/c: P(wait), then mean queue length and waiting time
+    offered = arrival_rate / service_rate
+    utilization = np.where(kits > 0, offered / np.maximum(kits, 1), np.inf)
+    p_wait = erlang_c(offered, kits)
+    stable = (utilization < 1) & (kits > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wait_hours = np.where(stable, p_wait / (kits * service_rate - arrival_rate), np.inf)
+    # A queue that can't clear within opening hours is treated as overloaded
+    wait_hours = np.where(wait_hours > open_hours, np.inf, wait_hours)
+    wait_hours = np.where(volume > 0, wait_hours, 0.0)
+
+    return {
+        'utilization': utilization,
+        'p_wait': p_wait,
+        'queue_length': np.where(np.isfinite(wait_hours), arrival_rate * wait_hours, np.inf),
+        'wait_minutes': wait_hours * 60,
+    }
+
+def district_totals(df):
+    # District table -> transactions per work type over the whole history
+    return {
+        'enrol': df['Enrol_Total'].to_numpy(dtype=float),
+        'demo': (df['demo_age_5_17'] + df['demo_age_17_']).to_numpy(dtype=float),
+        'bio': (df['bio_age_5_17'] + df['bio_age_17_']).to_numpy(dtype=float),
+    }
+
+def baseline_kits(states, totals, days, target_utilization=TARGET_UTILIZATION, open_hours=OPEN_HOURS,
+                  service_minutes=None):
+    # The kit inventory assumed when none is supplied, shared by the capacity model and the
+    # allocation planner: each state holds enough kits of each type for its average day at
+    # the target utilization, split evenly across its districts (the "equal share" deployment).
+    # totals: {work type: transactions per district over `days`} -> {kit type: kits per district}
+    service_minutes = service_minutes or SERVICE_MINUTES
+    kit_minutes = open_hours * 60 * target_utilization
+    states = pd.Series(np.asarray(states, dtype=object))
+    kits = {}
+    for kit, work in KIT_WORK.items():
+        need = pd.Series(sum(np.asarray(totals[w], dtype=float) * service_minutes[w] for w in work) / days / kit_minutes)
+        by_state = need.groupby(states)
+        kits[kit] = np.ceil(by_state.transform('sum') / by_state.transform('size')).to_numpy().astype(int)
+    return kits
+
+def cube_baseline_kits(cube, keys=None):
+    # baseline_kits over the cube's districts; keys (state, district frame) realigns it to
+    # another district table, so every model of one pipeline run starts from the same kits
+    demand = demand_from_cube(cube)
+    kits = baseline_kits(cube['keys']['state'], {k: v.sum(axis=1) for k, v in demand.items()},
+                         demand['enrol'].shape[1])
+    if keys is None:
+        return kits
+    index = pd.MultiIndex.from_frame(cube['keys'])
+    target = pd.MultiIndex.from_frame(keys[['state', 'district']])
+    return {kit: pd.Series(v, index=index).reindex(target).fillna(0).astype(int).to_numpy() for kit, v in kits.items()}
+
+def load_kit_inventory(keys, filename='aadhaar_kit_inventory.csv'):
+    # Optional state,district,Kits file; districts missing from it return -1
+    if not os.path.exists(filename):
+        return None
+    inventory = pd.read_csv(filename).set_index(['state', 'district'])['Kits']
+    return inventory.reindex(pd.MultiIndex.from_frame(keys)).fillna(-1).astype(int).to_numpy()
+
+def what_if_kits(demand, kits, changes, **kwargs):
+    # changes: {district position: new kit count}; everything else stays as-is
+    scenario = np.array(kits, dtype=int, copy=True)
+    for pos, count in changes.items():
+        scenario[pos] = count
+    return scenario, estimate_wait_times(demand, scenario, **kwargs)
+
+def build_capacity_report(cube, kits=None):
+    print("\n[Analysis] Running M/M/c Capacity Model (All Districts x Days)...")
+    demand = demand_from_cube(cube)
+    if kits is None:
+        kits = load_kit_inventory(cube['keys'])
+    estimated = sum(cube_baseline_kits(cube).values())     # Every kit serves the M/M/c queue
+    kits = estimated if kits is None else np.where(kits >= 0, kits, estimated)
+    result = estimate_wait_times(demand, kits)
+
+    wait = result['wait_minutes']
+    active = sum(demand.values()) > 0
+    finite_wait = np.where(active & np.isfinite(wait), wait, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # Districts with no finite-wait day
+        report = pd.DataFrame({
+            'Kits': kits,
+            'Active_Days': active.sum(axis=1),
+            'Overloaded_Days': (active & ~np.isfinite(wait)).sum(axis=1),
+            'Avg_Utilization': np.nanmean(np.where(active, np.minimum(result['utilization'], 1), np.nan), axis=1),
+            'Avg_Wait_Min': np.nanmean(finite_wait, axis=1),
+            'P95_Wait_Min': np.nanpercentile(finite_wait, 95, axis=1),
+        }, index=pd.MultiIndex.from_frame(cube['keys']))
+    print(f"   -> {int((report['Overloaded_Days'] > 0).sum())} districts have days beyond kit capacity")
+    return report
+
+def export_capacity_report(report, filename='aadhaar_capacity_model.csv'):
+    report.to_csv(filename)
+    print(f"   -> Saved capacity model to '{filename}'")
+    return report
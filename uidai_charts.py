@@ -0,0 +1,212 @@
+import matplotlib
+matplotlib.use('Agg')  # Headless: charts are only ever saved, never shown
+import matplotlib.pyplot as plt
+from matplotlib.patches import Patch
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from math import pi
+
+# Set visual aesthetics (applied in every render worker that imports this module)
+sns.set_theme(style="whitegrid")
+plt.rcParams['figure.figsize'] = (14, 8)
+
+# ==========================================
+# CHART DRAWING FUNCTIONS
+# ==========================================
+# Each function takes only the small aggregated table it plots, saves one PNG
+# and closes its figure, so they can run in any process of the render pool.
+
+# Above this many points a scatter is binned into a density raster instead
+DENSITY_POINTS = 5000
+
+def bin_density(frame, x, y, hue=None, extent=None, bins=150, outlier_z=3.5, max_outliers=500):
+    # Vectorized 2D histogram per hue group: (groups x bins x bins) counts, so the
+    # chart costs the same for any number of points. Points outside the extent or
+    # with a robust z-score above outlier_z on either axis are also kept as markers.
+    xv = pd.to_numeric(frame[x], errors='coerce').to_numpy(dtype=float)
+    yv = pd.to_numeric(frame[y], errors='coerce').to_numpy(dtype=float)
+    ok = np.isfinite(xv) & np.isfinite(yv)
+    if extent is None:
+        lo_x, hi_x = np.percentile(xv[ok], [0.5, 99.5]) if ok.any() else (0.0, 1.0)
+        lo_y, hi_y = np.percentile(yv[ok], [0.5, 99.5]) if ok.any() else (0.0, 1.0)
+        extent = (lo_x, max(hi_x, lo_x + 1e-9), lo_y, max(hi_y, lo_y + 1e-9))
+    x0, x1, y0, y1 = extent
+
+    # 1. Outliers: outside the raster, or far from the bulk (median/MAD)
+    def robust_z(v):
+        med = np.median(v[ok]) if ok.any() else 0.0
+        mad = np.median(np.abs(v[ok] - med)) if ok.any() else 0.0
+        return np.abs(v - med) * 0.6745 / max(mad, 1e-9)
+    outside = (xv < x0) | (xv > x1) | (yv < y0) | (yv > y1)
+    score = np.maximum(robust_z(xv), robust_z(yv))
+    outlier = ok & (outside | (score > outlier_z))
+    inlier = ok & ~outside
+
+    # 2. Bin everything else with one bincount over (group, row, col)
+    if hue is None:
+        codes, labels = np.zeros(len(frame), dtype=int), pd.Index(['All'])
+    else:
+        codes, labels = pd.factorize(frame[hue], sort=True)
+    ix = np.clip(((xv[inlier] - x0) / (x1 - x0) * bins).astype(int), 0, bins - 1)
+    iy = np.clip(((yv[inlier] - y0) / (y1 - y0) * bins).astype(int), 0, bins - 1)
+    flat = (codes[inlier] * bins + iy) * bins + ix
+    counts = np.bincount(flat, minlength=len(labels) * bins * bins).reshape(len(labels), bins, bins)
+
+    # Visible outliers first, most extreme first, capped so the marker layer stays bounded too
+    out_pos = np.flatnonzero(outlier)
+    out_pos = out_pos[np.lexsort((-score[out_pos], outside[out_pos]))[:max_outliers]]
+    return {
+        'counts': counts.astype(np.int32),
+        'extent': tuple(float(v) for v in extent),
+        'labels': list(labels),
+        'outliers': frame.iloc[out_pos],
+        'points': int(ok.sum()),
+    }
+
+def _draw_density(ax, density, palette):
+    # Each bin takes its groups' count-weighted colour; opacity follows log density
+    counts = density['counts'].astype(float)
+    total = counts.sum(axis=0)
+    colors = np.asarray(palette, dtype=float)[:len(counts), :3]
+    rgb = np.tensordot(counts, colors, axes=(0, 0)) / np.maximum(total, 1)[..., None]
+    alpha = np.log1p(total) / max(np.log1p(total.max()), 1e-9)
+    alpha = np.where(total > 0, 0.25 + 0.75 * alpha, 0.0)
+    ax.imshow(np.dstack([rgb, alpha]), origin='lower', extent=density['extent'],
+              aspect='auto', interpolation='nearest')
+
+def _density_legend(labels, palette, title):
+    handles = plt.gca().get_legend_handles_labels()[0]   # e.g. reference lines
+    handles += [Patch(color=c, label=str(l)) for l, c in zip(labels, palette)]
+    plt.legend(handles=handles, title=title)
+
+# A. Radar Chart (Weekend Gap)
+def draw_radar(values, days_order, filename):
+    values = list(values) + list(values[:1])
+    angles = [n / float(len(days_order)) * 2 * pi for n in range(len(days_order))]
+    angles += angles[:1]
+
+    fig = plt.figure(figsize=(8, 8))
+    ax = plt.subplot(111, polar=True)
+    plt.xticks(angles[:-1], days_order, color='grey', size=10)
+    ax.plot(angles, values, linewidth=1, linestyle='solid', color='blue')
+    ax.fill(angles, values, 'b', alpha=0.1)
+    plt.title('Weekly Activity Radar: The "Sunday Service Gap"', size=15, y=1.1)
+    plt.tight_layout()
+    fig.savefig(filename)
+    plt.close(fig)
+
+# B. Stacked Bar (Digital vs Physical)
+def draw_digital_physical(top_states, filename):
+    fig = plt.figure(figsize=(12, 6))
+    plt.bar(top_states.index, top_states['Demo_Share'], label='Demographic (Online/Easy)', color='#4c72b0')
+    plt.bar(top_states.index, top_states['Bio_Share'], bottom=top_states['Demo_Share'], label='Biometric (Physical/Hard)', color='#55a868')
+    plt.title('Digital Maturity: Demographic vs Biometric Update Composition', fontsize=14)
+    plt.legend()
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    fig.savefig(filename)
+    plt.close(fig)
+
+# C. Seasonality Line Chart
+def draw_seasonality(monthly, filename):
+    # monthly: Month x Year table; a single year keeps the original purple line
+    fig = plt.figure(figsize=(12, 5))
+    single = monthly.shape[1] == 1
+    monthly.plot(ax=plt.gca(), marker='o', linestyle='-', color='purple' if single else None, legend=not single)
+    plt.title('The "School Pulse": Monthly Seasonality of Child Enrolments', fontsize=14)
+    plt.grid(True)
+    plt.tight_layout()
+    fig.savefig(filename)
+    plt.close(fig)
+
+# D. Age Behaviour Scatter (Child vs Adult Bio Intensity)
+def draw_age_behavior(plot_data, filename, density=None, parity_max=None):
+    fig = plt.figure(figsize=(10, 6))
+    if density is not None:
+        # Density mode: binned raster, with only the outliers drawn as markers
+        palette = sns.color_palette(n_colors=len(density['labels']))
+        _draw_density(plt.gca(), density, palette)
+        plot_data = density['outliers']
+        hue_kw = {'palette': dict(zip(density['labels'], palette)), 'legend': False}
+    else:
+        hue_kw = {}
+    if len(plot_data):
+        sns.scatterplot(
+            data=plot_data,
+            x='R22_Adult_Bio_Intensity',
+            y='R21_Child_Bio_Intensity',
+            hue='Region',
+            alpha=0.6,
+            **hue_kw
+        )
+
+    # Add diagonal line (Parity)
+    max_val = parity_max if parity_max is not None else min(plot_data['R21_Child_Bio_Intensity'].max(), 10)
+    plt.plot([0, max_val], [0, max_val], 'r--', label='Equal Intensity')
+
+    plt.title('Behavioral Gap: Mandatory Child Bios vs Voluntary Adult Fixes', fontsize=14)
+    plt.xlabel('Adult Bio Intensity (Voluntary)', fontsize=12)
+    plt.ylabel('Child Bio Intensity (Mandatory)', fontsize=12)
+    plt.xlim(0, 5) # Zoom in to relevant range
+    plt.ylim(0, 10)
+    if density is not None:
+        _density_legend(density['labels'], palette, 'Region')
+    else:
+        plt.legend()
+    plt.tight_layout()
+    fig.savefig(filename)
+    plt.close(fig)
+
+# E. Pie Chart (Composition)
+def draw_pie(sizes, labels, colors, title, filename):
+    fig = plt.figure(figsize=(8, 8))
+    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=colors)
+    plt.title(title)
+    fig.savefig(filename)
+    plt.close(fig)
+
+# F. Top 10 Stacked Bar
+def draw_stacked_top10(table, label_col, stacks, title, ylabel, xlabel, filename):
+    # stacks: [(column, color, legend label), ...] drawn bottom-up
+    fig = plt.figure(figsize=(12, 6))
+    bottom = None
+    for col, color, label in stacks:
+        plt.bar(table[label_col], table[col], bottom=bottom, color=color, label=label)
+        bottom = table[col] if bottom is None else bottom + table[col]
+
+    plt.title(title, fontsize=14)
+    plt.ylabel(ylabel)
+    plt.xlabel(xlabel)
+    plt.xticks(rotation=45, ha='right')
+    plt.legend()
+    plt.tight_layout()
+    fig.savefig(filename)
+    plt.close(fig)
+
+# G. ML Cluster Scatter
+def draw_cluster_scatter(plot_data, filename, density=None):
+    fig = plt.figure(figsize=(10, 6))
+    if density is not None:
+        palette = sns.color_palette('viridis', n_colors=len(density['labels']))
+        _draw_density(plt.gca(), density, palette)
+        plot_data = density['outliers']
+        hue_kw = {'palette': dict(zip(density['labels'], palette)), 'legend': False}
+    else:
+        hue_kw = {'palette': 'viridis'}
+    if len(plot_data):
+        sns.scatterplot(
+            data=plot_data,
+            x='UER_Score',
+            y='Catch_Up_Index',
+            hue='Cluster_ID',
+            s=100, alpha=0.7,
+            **hue_kw
+        )
+    if density is not None:
+        _density_legend(density['labels'], palette, 'Cluster_ID')
+    plt.title('ML-Based District Segmentation', fontsize=14)
+    plt.xlabel('Maintenance Intensity (UER)', fontsize=12)
+    plt.ylabel('Growth Potential (Catch-up Index)', fontsize=12)
+    fig.savefig(filename)
+    plt.close(fig)
@@ -0,0 +1,49 @@
+import pandas as pd
+import numpy as np
+
+# ==========================================
+# MULTI-DISTRICT COMPARISON (VECTORIZED)
+# ==========================================
+COMPARE_METRICS = ['Grand_Total', 'Enrol_Total', 'Update_Total',
+                   'UER_Score', 'Catch_Up_Index', 'Adult_Entry_Rate', 'CV_Volatility']
+
+def compare_districts(df, positions, metrics=COMPARE_METRICS, state_median=True):
+    # positions: row positions in df, the first one is the base district. Returns one row
+    # per (entity, metric) with the value, delta and % difference vs the base, and the
+    # entity's percentile among the districts of its own state.
+    metrics = [m for m in metrics if m in df.columns]
+    values = df[metrics].to_numpy(dtype=float)
+    states = df['state'].to_numpy()
+    positions = np.asarray(positions, dtype=int)
+
+    # 1. Selected slice (+ the base district's state median as a benchmark row)
+    sel = values[positions]
+    sel_states = states[positions]
+    # 'District (State)': several district names exist in more than one state
+    labels = [f"{d} ({s})" for d, s in zip(df['district'].to_numpy()[positions], sel_states)]
+    if state_median:
+        in_base_state = states == sel_states[0]
+        sel = np.vstack([sel, np.nanmedian(values[in_base_state], axis=0)])
+        sel_states = np.append(sel_states, sel_states[0])
+        labels.append(f"{sel_states[0]} (median)")
+
+    # 2. Deltas and % differences against the base, all entities x metrics at once
+    delta = sel - sel[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_diff = np.where(sel[0] != 0, delta / np.abs(sel[0]) * 100, np.nan)
+
+    # 3. Within-state percentile: share of the entity's state at or below its value
+    same_state = sel_states[:, None] == states[None, :]                       # (entities, districts)
+    at_or_below = (values[None, :, :] <= sel[:, None, :]) & same_state[:, :, None]
+    state_pct = at_or_below.sum(axis=1) / np.maximum(same_state.sum(axis=1), 1)[:, None] * 100
+
+    n, m = sel.shape
+    return pd.DataFrame({
+        'District': np.repeat(labels, m),
+        'State': np.repeat(sel_states, m),
+        'Metric': np.tile(metrics, n),
+        'Value': sel.ravel(),
+        'Delta': delta.ravel(),
+        'Pct_Diff': pct_diff.ravel(),
+        'State_Pctile': state_pct.ravel(),
+    })
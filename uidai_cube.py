@@ -0,0 +1,62 @@
+import pandas as pd
+import numpy as np
+
+# ==========================================
+# DENSE DAILY CUBE (DISTRICT x DAY x MEASURE)
+# ==========================================
+# Count columns carried into the cube, in the order they are stacked
+CUBE_MEASURES = {
+    'Enrolment': ['age_0_5', 'age_5_17', 'age_18_greater'],
+    'Demographic': ['demo_age_5_17', 'demo_age_17_'],
+    'Biometric': ['bio_age_5_17', 'bio_age_17_'],
+}
+
+def build_daily_cube(enrol, demo, bio):
+    print("\n[Action] Building Dense Daily Cube (District x Day x Measure)...")
+    frames = {'Enrolment': enrol, 'Demographic': demo, 'Biometric': bio}
+    frames = {k: f for k, f in frames.items() if not f.empty and 'date' in f.columns}
+
+    # 1. Shared axes: every district seen in any dataset, every calendar day in range
+    keys = pd.concat([f[['state', 'district']] for f in frames.values()], ignore_index=True)
+    keys = keys.drop_duplicates().sort_values(['state', 'district']).reset_index(drop=True)
+    district_index = pd.MultiIndex.from_frame(keys)
+
+    all_dates = pd.concat([f['date'] for f in frames.values()]).dropna()
+    dates = pd.date_range(all_dates.min().normalize(), all_dates.max().normalize(), freq='D')
+
+    measures = [m for cat in CUBE_MEASURES for m in CUBE_MEASURES[cat]]
+    n_dist, n_days = len(keys), len(dates)
+    values = np.zeros((n_dist, n_days, len(measures)))
+
+    # 2. Scatter each dataset into the cube with one bincount per measure
+    for category, df in frames.items():
+        df = df.dropna(subset=['date'])
+        d_pos = district_index.get_indexer(pd.MultiIndex.from_frame(df[['state', 'district']]))
+        t_pos = (df['date'].dt.normalize() - dates[0]).dt.days.to_numpy()
+        flat = d_pos * n_days + t_pos
+        for col in CUBE_MEASURES[category]:
+            if col not in df.columns:
+                continue
+            counts = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype=float)
+            values[:, :, measures.index(col)] = np.bincount(
+                flat, weights=counts, minlength=n_dist * n_days
+            ).reshape(n_dist, n_days)
+
+    print(f"   -> Cube shape: {n_dist} districts x {n_days} days x {len(measures)} measures")
+    return {'keys': keys, 'dates': dates, 'measures': measures, 'values': values}
+
+def cube_measure(cube, columns):
+    # Sum of one or more measures -> (districts x days) array
+    if isinstance(columns, str):
+        columns = [columns]
+    idx = [cube['measures'].index(c) for c in columns]
+    return cube['values'][:, :, idx].sum(axis=2)
+
+def cube_frame(cube):
+    # Long (state, district, date, YearMonth, measures...) table of the days with any activity
+    d_pos, t_pos = np.nonzero(cube['values'].sum(axis=2))
+    frame = cube['keys'].iloc[d_pos].reset_index(drop=True)
+    frame['date'] = cube['dates'][t_pos]
+    frame['YearMonth'] = frame['date'].dt.to_period('M').astype(str)
+    values = pd.DataFrame(cube['values'][d_pos, t_pos], columns=cube['measures'])
+    return pd.concat([frame, values], axis=1)
@@ -0,0 +1,122 @@
+import pandas as pd
+import io
+import zipfile
+
+try:
+    import pyarrow as pa                # Parquet export (optional)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from uidai_store import iter_monthly_slices
+
+# ==========================================
+# BULK EXPORT (DISTRICTS + MONTHLY SERIES)
+# ==========================================
+# Rows are encoded chunk by chunk and bulk_export yields the file as it is written, so the
+# API can stream any selection with chunked transfer encoding while holding about one chunk.
+# Small dashboard downloads collect the same stream into one buffer (export_buffer).
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_STREAM_ROWS = 200_000    # Above this many rows the dashboard links to the streaming endpoint
+EXPORT_FORMATS = {'CSV': ('csv', 'text/csv'),
+                  'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+                  'Zip Bundle (CSV)': ('zip', 'application/zip')}
+
+def export_formats():
+    return [f for f in EXPORT_FORMATS if f != 'Parquet' or pq is not None]
+
+class _ChunkSink:
+    # Write-only file object; drain() hands back (and forgets) everything written since the
+    # last call. tell() but no seek(): zipfile then writes data descriptors instead of seeking back
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+def _district_chunks(df, positions, chunk_rows):
+    for start in range(0, len(positions), chunk_rows):
+        yield df.iloc[positions[start:start + chunk_rows]]
+
+def _write_csv(chunks, target):
+    # target: binary file object; the header goes out with the first chunk only.
+    # Yields after each chunk so the caller can pass the bytes on.
+    header = True
+    for chunk in chunks:
+        target.write(chunk.to_csv(index=False, header=header).encode('utf-8'))
+        header = False
+        yield
+
+def _write_parquet(chunks, target):
+    # One row group per chunk; later chunks are cast to the first chunk's schema
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False,
+                                     schema=writer.schema if writer else None)
+        if writer is None:
+            writer = pq.ParquetWriter(target, table.schema)
+        writer.write_table(table)
+        yield
+    if writer is not None:
+        writer.close()
+
+def export_rows(df, positions, monthly_ranges, fmt, content='districts'):
+    # Rows the export will carry (districts, monthly rows, or both for the zip bundle)
+    keys = zip(df['state'].to_numpy()[positions], df['district'].to_numpy()[positions])
+    monthly = sum(end - start for start, end in (monthly_ranges.get(key, (0, 0)) for key in keys))
+    if EXPORT_FORMATS[fmt][0] == 'zip':
+        return len(positions) + monthly
+    return monthly if content == 'monthly' else len(positions)
+
+def bulk_export(df, positions, monthly_source, monthly_ranges, fmt, content='districts',
+                chunk_rows=EXPORT_CHUNK_ROWS):
+    # positions: district row positions in df. content: 'districts' or 'monthly' for the
+    # single-file formats; the zip bundle always carries both (one member per file).
+    # Yields the file as byte chunks, about one chunk_rows batch of encoded rows each.
+    kind = EXPORT_FORMATS[fmt][0]
+    keys = list(zip(df['state'].to_numpy()[positions], df['district'].to_numpy()[positions]))
+
+    def chunks(which):
+        if which == 'monthly':
+            return iter_monthly_slices(monthly_source, monthly_ranges, keys, chunk_rows)
+        return _district_chunks(df, positions, chunk_rows)
+
+    sink = _ChunkSink()
+    if kind == 'zip':
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+            for which, name in [('districts', 'districts.csv'), ('monthly', 'monthly_trends.csv')]:
+                with bundle.open(name, 'w', force_zip64=True) as member:
+                    for _ in _write_csv(chunks(which), member):
+                        yield sink.drain()
+    else:
+        writer = _write_parquet if kind == 'parquet' else _write_csv
+        for _ in writer(chunks(content), sink):
+            yield sink.drain()
+    yield sink.drain()      # Zip central directory / Parquet footer
+
+def export_buffer(*args, **kwargs):
+    # The whole export in one BytesIO (st.download_button reads it once; no extra copy here)
+    buffer = io.BytesIO()
+    for data in bulk_export(*args, **kwargs):
+        buffer.write(data)
+    buffer.seek(0)
+    return buffer
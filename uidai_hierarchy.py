@@ -0,0 +1,127 @@
+import pandas as pd
+import numpy as np
+import os
+
+from uidai_store import atomic_write
+
+# ==========================================
+# ADMINISTRATIVE HIERARCHY (DISTRICT -> STATE -> REGION -> NATION)
+# ==========================================
+NATION = 'India'
+LEVELS = ['nation', 'region', 'state', 'district']
+ROLLUP_FILE = 'aadhaar_rollup.csv'
+
+# Every state and UT (post-2020 names, plus the older ones raw dumps may still carry)
+REGION_MAP = {
+    'Jammu and Kashmir': 'North', 'Ladakh': 'North', 'Himachal Pradesh': 'North', 'Punjab': 'North',
+    'Chandigarh': 'North', 'Uttarakhand': 'North', 'Haryana': 'North', 'Delhi': 'North',
+    'Uttar Pradesh': 'North',
+    'Bihar': 'East', 'Jharkhand': 'East', 'West Bengal': 'East', 'Odisha': 'East',
+    'Andaman and Nicobar Islands': 'East',
+    'Rajasthan': 'West', 'Gujarat': 'West', 'Maharashtra': 'West', 'Goa': 'West',
+    'Dadra and Nagar Haveli and Daman and Diu': 'West', 'Dadra and Nagar Haveli': 'West', 'Daman and Diu': 'West',
+    'Madhya Pradesh': 'Central', 'Chhattisgarh': 'Central',
+    'Andhra Pradesh': 'South', 'Telangana': 'South', 'Karnataka': 'South', 'Kerala': 'South',
+    'Tamil Nadu': 'South', 'Puducherry': 'South', 'Lakshadweep': 'South',
+    'Assam': 'North East', 'Arunachal Pradesh': 'North East', 'Meghalaya': 'North East',
+    'Mizoram': 'North East', 'Nagaland': 'North East', 'Tripura': 'North East', 'Manipur': 'North East',
+    'Sikkim': 'North East',
+}
+
+# Additive counts; every ratio is recomputed from these at each level
+ROLLUP_COUNTS = ['age_0_5', 'age_5_17', 'age_18_greater',
+                 'demo_age_5_17', 'demo_age_17_', 'bio_age_5_17', 'bio_age_17_']
+
+def region_of(states):
+    # Unknown names (new UTs, spelling drift) land in 'Other'
+    return pd.Series(states, dtype=object).map(REGION_MAP).fillna('Other').to_numpy()
+
+def rollup_ratios(frame):
+    # Same definitions as the district metrics, applied to summed counts
+    frame['Enrol_Total'] = frame['age_0_5'] + frame['age_5_17'] + frame['age_18_greater']
+    frame['Demo_Total'] = frame['demo_age_5_17'] + frame['demo_age_17_']
+    frame['Bio_Total'] = frame['bio_age_5_17'] + frame['bio_age_17_']
+    frame['Update_Total'] = frame['Demo_Total'] + frame['Bio_Total']
+    frame['Grand_Total'] = frame['Enrol_Total'] + frame['Update_Total']
+    frame['UER_Score'] = frame['Update_Total'] / (frame['Enrol_Total'] + 1)
+    frame['Catch_Up_Index'] = frame['age_5_17'] / (frame['age_0_5'] + 1)
+    frame['Adult_Entry_Rate'] = frame['age_18_greater'] / (frame['Enrol_Total'] + 1)
+    frame['Adult_Share_Pct'] = frame['age_18_greater'] / frame['Enrol_Total'].where(frame['Enrol_Total'] > 0) * 100
+    frame['R21_Child_Bio_Intensity'] = frame['bio_age_5_17'] / (frame['demo_age_5_17'] + 1)
+    frame['R22_Adult_Bio_Intensity'] = frame['bio_age_17_'] / (frame['demo_age_17_'] + 1)
+    grand = frame['Grand_Total'].where(frame['Grand_Total'] > 0)
+    frame['R23_Adult_Workload_Share'] = (frame['demo_age_17_'] + frame['bio_age_17_']) / grand
+    frame['R24_Infant_Enrol_Share'] = frame['age_0_5'] / grand
+    return frame
+
+def build_rollup(districts):
+    # districts: one row per (state, district) with the ROLLUP_COUNTS columns.
+    # Returns one row per entity at every level, keyed by its path ('India/South/Kerala/...')
+    # with the parent's key alongside, so any level or subtree is a plain filter.
+    print("\n[Action] Building Hierarchical Rollup (District -> State -> Region -> Nation)...")
+    counts = districts[ROLLUP_COUNTS].to_numpy(dtype=float)
+
+    # 1. District -> state: one scatter-add over the district table
+    state_codes, states = pd.factorize(districts['state'], sort=True)
+    state_counts = np.zeros((len(states), len(ROLLUP_COUNTS)))
+    np.add.at(state_counts, state_codes, counts)
+
+    # 2. State -> region -> nation, on the (small) state sums
+    states = np.asarray(states, dtype=object)
+    state_regions = region_of(states)
+    region_codes, regions = pd.factorize(state_regions, sort=True)
+    region_counts = np.zeros((len(regions), len(ROLLUP_COUNTS)))
+    np.add.at(region_counts, region_codes, state_counts)
+    nation_counts = region_counts.sum(axis=0, keepdims=True)
+
+    # 3. Keys and parent keys
+    regions = np.asarray(regions, dtype=object)
+    region_keys = NATION + '/' + regions
+    state_keys = region_keys[region_codes] + '/' + states
+    district_keys = state_keys[state_codes] + '/' + districts['district'].to_numpy(dtype=object)
+
+    levels = [
+        ('nation', [NATION], [''], [''], [''], [''], nation_counts, [len(regions)]),
+        ('region', region_keys, [NATION] * len(regions), regions, [''] * len(regions), [''] * len(regions),
+         region_counts, np.bincount(region_codes, minlength=len(regions))),
+        ('state', state_keys, region_keys[region_codes], state_regions, states, [''] * len(states),
+         state_counts, np.bincount(state_codes, minlength=len(states))),
+        ('district', district_keys, state_keys[state_codes], state_regions[state_codes],
+         districts['state'].to_numpy(dtype=object), districts['district'].to_numpy(dtype=object),
+         counts, np.zeros(len(districts), dtype=int)),
+    ]
+    frames = []
+    for level, keys, parents, region, state, district, values, children in levels:
+        frame = pd.DataFrame(values, columns=ROLLUP_COUNTS)
+        frame.insert(0, 'Level', level)
+        frame.insert(1, 'Key', keys)
+        frame.insert(2, 'Parent', parents)
+        frame.insert(3, 'Region', region)
+        frame.insert(4, 'state', state)
+        frame.insert(5, 'district', district)
+        frame['Children'] = children
+        frames.append(frame)
+    rollup = rollup_ratios(pd.concat(frames, ignore_index=True))
+    print(f"   -> 1 nation, {len(regions)} regions, {len(states)} states, {len(districts)} districts")
+    return rollup
+
+def rollup_level(rollup, level, parent=None):
+    # Rows of one level, indexed by their own name (region / state / district key)
+    rows = rollup[rollup['Level'] == level]
+    if parent is not None:
+        rows = rows[rows['Parent'] == parent]
+    name = {'nation': 'Key', 'region': 'Region', 'state': 'state', 'district': 'Key'}[level]
+    return rows.set_index(name)
+
+def save_rollup(rollup, filename=ROLLUP_FILE):
+    atomic_write(filename, lambda path: rollup.to_csv(path, index=False))
+    print(f"   -> Saved rollup cube to '{filename}'")
+    return rollup
+
+def load_rollup(filename=ROLLUP_FILE):
+    if not os.path.exists(filename):
+        return None
+    rollup = pd.read_csv(filename)
+    text = ['Key', 'Parent', 'Region', 'state', 'district']
+    rollup[text] = rollup[text].fillna('')      # Blank = not applicable at this level
+    return rollup
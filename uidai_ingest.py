@@ -0,0 +1,47 @@
+import pandas as pd
+import numpy as np
+
+# ==========================================
+# INGEST-TIME DEDUPLICATION ACROSS RAW SHARDS
+# ==========================================
+# Re-downloaded or overlapping API shards repeat rows verbatim. Each row is normalised
+# (date, state, district, pincode if present, counts) and hashed to one uint64; a sorted
+# array of the fingerprints seen so far (8 bytes per unique row, no row copies) decides
+# which rows of the next shard are new.
+DEDUP_KEYS = ['date', 'state', 'district', 'pincode']
+TEXT_KEYS = ['date', 'state', 'district']
+
+def row_fingerprints(frame):
+    # Key columns first, then every other column as a count
+    cols = [c for c in DEDUP_KEYS if c in frame.columns] + [c for c in frame.columns if c not in DEDUP_KEYS]
+    normal = {}
+    for col in cols:
+        if col in TEXT_KEYS:
+            # ' Kerala', 'KERALA' and 'Kerala  ' are the same row
+            normal[col] = frame[col].astype(str).str.strip().str.replace(r'\s+', ' ', regex=True).str.casefold()
+        else:
+            normal[col] = pd.to_numeric(frame[col], errors='coerce').astype(float)   # '12' == 12 == 12.0
+    return pd.util.hash_pandas_object(pd.DataFrame(normal), index=False).to_numpy()
+
+class RowDeduper:
+    # One per dataset; feed shards in order, the first occurrence of a row wins
+    def __init__(self):
+        self.seen = np.empty(0, dtype=np.uint64)
+
+    def filter(self, frame):
+        # -> (unique new rows, duplicates within this shard, rows already seen in earlier shards)
+        if frame.empty:
+            return frame, 0, 0
+        prints = row_fingerprints(frame)
+        unique, first = np.unique(prints, return_index=True)
+
+        # Binary search of the sorted seen set
+        pos = np.searchsorted(self.seen, unique)
+        earlier = np.zeros(len(unique), dtype=bool)
+        inside = pos < len(self.seen)
+        earlier[inside] = self.seen[pos[inside]] == unique[inside]
+
+        keep = np.zeros(len(frame), dtype=bool)
+        keep[first[~earlier]] = True
+        self.seen = np.sort(np.concatenate([self.seen, unique[~earlier]]), kind='mergesort')
+        return frame[keep], len(frame) - len(unique), int(earlier.sum())
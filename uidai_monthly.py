@@ -7,6 +7,9 @@ import seaborn as sns
 from math import pi
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
+from uidai_partitions import write_partitioned
+from uidai_ingest import RowDeduper
+from uidai_store import export_arrow, export_monthly_arrow, add_dashboard_features, atomic_write, DISTRICT_CSV
 
 # Set visual aesthetics
 sns.set_theme(style="whitegrid")
@@ -26,15 +29,23 @@ def load_datasets(base_path="."):
     print("Loading datasets...")
     for category, pattern in files_map.items():
         full_pattern = os.path.join(base_path, pattern)
-        files = glob.glob(full_pattern)
+        files = sorted(glob.glob(full_pattern))   # Stable order across runs: the first copy of a row wins
         
         df_list = []
+        deduper = RowDeduper()
+        removed = 0
         for file in files:
             try:
                 temp = pd.read_csv(file)
-                df_list.append(temp)
             except Exception as e:
                 print(f"Skipped {file}: {e}")
+                continue
+            temp, within, across = deduper.filter(temp)
+            if within or across:
+                print(f"   -> {os.path.basename(file)}: dropped {within + across} duplicate rows "
+                      f"({within} within the shard, {across} from earlier shards)")
+            removed += within + across
+            df_list.append(temp)
         
         if df_list:
             df = pd.concat(df_list, ignore_index=True)
@@ -43,7 +54,7 @@ def load_datasets(base_path="."):
                 # Date Features
                 df['Month'] = df['date'].dt.month_name()
             datasets[category] = df
-            print(f"   -> Loaded {category}: {len(df)} records")
+            print(f"   -> Loaded {category}: {len(df)} records ({removed} duplicates removed)")
         else:
             print(f"   -> No files found for {category}")
             datasets[category] = pd.DataFrame() 
@@ -278,8 +289,9 @@ if __name__ == "__main__":
     demo_df = clean_data(demo_df)
     bio_df = clean_data(bio_df)
     
-    # 3. Generate Monthly Trend File (CSV)
-    export_monthly_data(enrol_df, demo_df, bio_df)
+    # 3. Generate Monthly Trend File (CSV + indexed Arrow store for the Trends tab)
+    monthly_ts = export_monthly_arrow(export_monthly_data(enrol_df, demo_df, bio_df))
+    write_partitioned(monthly_ts, 'monthly')   # state x month Parquet tree + manifest
     
     # 4. Generate Aggregated Master File
     master_df = calculate_metrics(enrol_df, demo_df, bio_df)
@@ -288,8 +300,10 @@ if __name__ == "__main__":
     master_df = perform_clustering(master_df)
     
     # 6. Save Final Files
+    master_df = add_dashboard_features(master_df)
     master_df.to_csv('aadhaar_district_analytics_ML_final.csv', index=False)
-    master_df.to_csv('aadhaar_district_analytics_final_cleaned.csv', index=False)
+    atomic_write(DISTRICT_CSV, lambda path: master_df.to_csv(path, index=False))  # The dashboard may be reading it
+    export_arrow(master_df)
     
     print("\n[DONE] All files generated:")
     print("1. aadhaar_monthly_district_trends.csv (For Monthly Tabs)")
@@ -0,0 +1,114 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa                # Columnar partitions (optional; skipped without it)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from uidai_store import atomic_write
+
+# ==========================================
+# PARTITIONED OUTPUTS (STATE x MONTH, PARQUET + MANIFEST)
+# ==========================================
+# aadhaar_partitions/<dataset>/state=<state>/YearMonth=<yyyy-mm>/part-0.parquet
+# Hive-style paths (URI-encoded values), so pyarrow.dataset / DuckDB / Spark can read the
+# tree directly; the partition columns live in the path, not in the files. _manifest.json
+# lists every partition with its row count and a content fingerprint: readers pick files
+# from it, and a rewrite only touches partitions whose content changed.
+PARTITION_ROOT = 'aadhaar_partitions'
+PARTITION_COLS = ['state', 'YearMonth']
+MANIFEST_FILE = '_manifest.json'   # Leading '_': skipped by dataset readers' file discovery
+
+def _partition_path(values):
+    return '/'.join(f"{col}={quote(str(v), safe='')}" for col, v in zip(PARTITION_COLS, values)) + '/part-0.parquet'
+
+def _fingerprint(frame):
+    return hashlib.sha1(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+def load_manifest(dataset, root=PARTITION_ROOT):
+    path = os.path.join(root, dataset, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_partitioned(frame, dataset, root=PARTITION_ROOT, sort_cols=('district',)):
+    # frame must carry the PARTITION_COLS. Unchanged partitions are left as they are,
+    # vanished ones are deleted, and the manifest is replaced last (atomically).
+    if pq is None:
+        print(f"   -> pyarrow not installed; skipped partitioned '{dataset}'")
+        return None
+    base = os.path.join(root, dataset)
+    old = {p['path']: p for p in (load_manifest(dataset, root) or {}).get('partitions', [])}
+
+    # 1. One sort, then each partition is a contiguous run of rows
+    frame = frame.sort_values(PARTITION_COLS + [c for c in sort_cols if c in frame.columns],
+                              kind='stable').reset_index(drop=True)
+    keys = frame[PARTITION_COLS].astype(str)
+    starts = np.flatnonzero(np.r_[True, (keys.to_numpy()[1:] != keys.to_numpy()[:-1]).any(axis=1)])
+    ends = np.r_[starts[1:], len(frame)]
+    data = frame.drop(columns=PARTITION_COLS)
+
+    # 2. Write only new / changed partitions
+    partitions, written = [], 0
+    for start, end in zip(starts, ends):
+        values = keys.iloc[start].tolist()
+        part = data.iloc[start:end].reset_index(drop=True)
+        entry = {**dict(zip(PARTITION_COLS, values)), 'path': _partition_path(values),
+                 'rows': int(end - start), 'fingerprint': _fingerprint(part)}
+        target = os.path.join(base, entry['path'])
+        previous = old.get(entry['path'])
+        if previous is None or previous['fingerprint'] != entry['fingerprint'] or not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            atomic_write(target, lambda path: pq.write_table(table, path))
+            written += 1
+        partitions.append(entry)
+
+    # 3. Drop partitions that no longer exist in the data
+    current = {p['path'] for p in partitions}
+    removed = [path for path in old if path not in current]
+    for path in removed:
+        target = os.path.join(base, path)
+        if os.path.exists(target):
+            os.remove(target)
+            try:
+                os.removedirs(os.path.dirname(target))   # Empty month / state folders
+            except OSError:
+                pass
+
+    manifest = {'dataset': dataset, 'partition_cols': PARTITION_COLS,
+                'columns': list(data.columns), 'rows': int(len(frame)),
+                'created': pd.Timestamp.now().isoformat(timespec='seconds'), 'partitions': partitions}
+
+    def write_manifest(path):
+        with open(path, 'w') as f:
+            json.dump(manifest, f, indent=1)
+
+    atomic_write(os.path.join(base, MANIFEST_FILE), write_manifest)
+    print(f"   -> Partitioned '{dataset}': {len(partitions)} partitions "
+          f"({written} written, {len(partitions) - written} unchanged, {len(removed)} removed)")
+    return manifest
+
+def read_partitioned(dataset, root=PARTITION_ROOT, states=None, months=None, columns=None):
+    # Reads only the partitions matching the state / YearMonth filters (None = all)
+    manifest = load_manifest(dataset, root)
+    if manifest is None or pq is None:
+        return pd.DataFrame()
+    selected = [p for p in manifest['partitions']
+                if (states is None or p['state'] in states) and (months is None or p['YearMonth'] in months)]
+    frames = []
+    for p in selected:
+        part = pq.read_table(os.path.join(root, dataset, p['path']), columns=columns).to_pandas()
+        for col in reversed(PARTITION_COLS):
+            part.insert(0, col, p[col])
+        frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=PARTITION_COLS + (columns or manifest['columns']))
+    return pd.concat(frames, ignore_index=True)
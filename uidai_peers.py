@@ -0,0 +1,47 @@
+import pandas as pd
+import numpy as np
+from sklearn.neighbors import KDTree
+from sklearn.preprocessing import StandardScaler
+
+# ==========================================
+# K-NEAREST PEER DISTRICTS (PRECOMPUTED)
+# ==========================================
+PEER_FEATURES = ['UER_Score', 'Catch_Up_Index', 'Adult_Entry_Rate', 'CV_Volatility',
+                 'R21_Child_Bio_Intensity', 'R22_Adult_Bio_Intensity']
+
+def build_peer_index(df, k=10):
+    print(f"\n[Analysis] Building {k}-Nearest Peer District Index...")
+    features = [f for f in PEER_FEATURES if f in df.columns]
+    X = df[features].replace([np.inf, -np.inf], 0).fillna(0)
+    X_scaled = StandardScaler().fit_transform(X)
+
+    # Query k+1: every district is its own nearest neighbour at distance 0
+    tree = KDTree(X_scaled)
+    k_eff = min(k + 1, len(df))
+    dist, idx = tree.query(X_scaled, k=k_eff)
+
+    # Drop the self match (not always column 0 when two districts are identical)
+    self_match = idx == np.arange(len(df))[:, None]
+    self_match[~self_match.any(axis=1), -1] = True
+    keep = ~self_match
+    n_peers = k_eff - 1
+    idx = idx[keep].reshape(len(df), n_peers)
+    dist = dist[keep].reshape(len(df), n_peers)
+
+    states = df['state'].to_numpy()
+    districts = df['district'].to_numpy()
+    peers = pd.DataFrame({
+        'state': np.repeat(states, n_peers),
+        'district': np.repeat(districts, n_peers),
+        'Peer_Rank': np.tile(np.arange(1, n_peers + 1), len(df)),
+        'Peer_State': states[idx.ravel()],
+        'Peer_District': districts[idx.ravel()],
+        'Distance': dist.ravel(),
+    })
+    print(f"   -> Indexed {len(df)} districts on {len(features)} standardized metrics")
+    return peers.sort_values(['state', 'district', 'Peer_Rank'], kind='stable').reset_index(drop=True)
+
+def export_district_peers(peers, filename='aadhaar_district_peers.csv'):
+    peers.to_csv(filename, index=False)
+    print(f"   -> Saved peer index to '{filename}'")
+    return peers
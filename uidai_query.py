@@ -0,0 +1,87 @@
+import pandas as pd
+import numpy as np
+
+# ==========================================
+# CROSS-DISTRICT QUERY ENGINE (SORTED INDEXES + BITMAPS)
+# ==========================================
+# Built once per data load. Numeric columns keep a sorted copy and its row order, so a
+# range predicate is two binary searches; categorical columns keep one packed bitmap per
+# value. A compound query is the AND of its bitmaps.
+QUERY_CATEGORIES = ['state', 'Region', 'Cluster_ID', 'System_Phase']
+QUERY_OPS = ['>', '>=', '<', '<=', '==', 'between']
+
+def build_query_index(df, categories=QUERY_CATEGORIES, numeric=None):
+    categories = [c for c in categories if c in df.columns]
+    if numeric is None:
+        numeric = [c for c in df.select_dtypes('number').columns if c not in categories]
+    n = len(df)
+    index = {'n': n, 'sorted': {}, 'bitmaps': {}}
+
+    # 1. Sorted column indexes (NaNs dropped: they never match a range)
+    for col in numeric:
+        values = df[col].to_numpy(dtype=float)
+        order = np.argsort(values, kind='stable')
+        valid = int(np.count_nonzero(~np.isnan(values)))
+        index['sorted'][col] = (values[order[:valid]], order[:valid])
+
+    # 2. One bitmap per categorical value
+    for col in categories:
+        codes, uniques = pd.factorize(df[col], sort=True)
+        present = codes >= 0
+        bits = np.zeros((len(uniques), n), dtype=bool)
+        bits[codes[present], np.flatnonzero(present)] = True
+        index['bitmaps'][col] = dict(zip(uniques.tolist(), np.packbits(bits, axis=1)))
+    return index
+
+def _range_bitmap(index, col, op, value):
+    values, order = index['sorted'][col]
+    if op == 'between':
+        lo, hi = np.searchsorted(values, value[0], 'left'), np.searchsorted(values, value[1], 'right')
+    else:
+        lo, hi = {
+            '>': (np.searchsorted(values, value, 'right'), len(values)),
+            '>=': (np.searchsorted(values, value, 'left'), len(values)),
+            '<': (0, np.searchsorted(values, value, 'left')),
+            '<=': (0, np.searchsorted(values, value, 'right')),
+            '==': (np.searchsorted(values, value, 'left'), np.searchsorted(values, value, 'right')),
+        }[op]
+    mask = np.zeros(index['n'], dtype=bool)
+    mask[order[lo:hi]] = True
+    return np.packbits(mask)
+
+def run_query(index, conditions=(), categories=None):
+    # conditions: [(column, op, value)], value is (lo, hi) for 'between'.
+    # categories: {column: [values]}, OR within a column, AND across columns.
+    # Returns the matching row positions, ascending.
+    bitmaps = [_range_bitmap(index, col, op, value) for col, op, value in conditions]
+    empty = np.zeros((index['n'] + 7) // 8, dtype=np.uint8)
+    for col, wanted in (categories or {}).items():
+        if wanted:
+            per_value = index['bitmaps'][col]
+            bitmaps.append(np.bitwise_or.reduce([per_value.get(v, empty) for v in wanted]))
+    if not bitmaps:
+        return np.arange(index['n'])
+    return np.flatnonzero(np.unpackbits(np.bitwise_and.reduce(bitmaps), count=index['n']))
+
+def query_page(df, index, positions, sort_by, ascending=False, page=1, page_size=25, columns=None):
+    # Sorts the hits (via the sorted index when the column has one), then cuts out one page.
+    # Returns (page frame, total hits, page count).
+    if sort_by in index['sorted']:
+        order = index['sorted'][sort_by][1]
+        hit = np.zeros(index['n'], dtype=bool)
+        hit[positions] = True
+        ranked = order[hit[order]]
+        if not ascending:
+            ranked = ranked[::-1]
+        missing = np.setdiff1d(positions, ranked, assume_unique=True)   # NaN values go last
+        ranked = np.concatenate([ranked, missing])
+    else:
+        ranked = np.asarray(positions)[np.argsort(df[sort_by].to_numpy()[positions], kind='stable')]
+        if not ascending:
+            ranked = ranked[::-1]
+
+    total = len(ranked)
+    n_pages = max(-(-total // page_size), 1)
+    page = min(max(page, 1), n_pages)
+    rows = df.iloc[ranked[(page - 1) * page_size:page * page_size]]
+    return (rows[columns] if columns else rows), total, n_pages
@@ -0,0 +1,137 @@
+import pandas as pd
+import numpy as np
+import os
+
+from uidai_hierarchy import build_rollup, rollup_level, ROLLUP_COUNTS
+
+# ==========================================
+# SHARED TOP-N RANKING INDEX
+# ==========================================
+# Registry: metric -> how its districts roll up to a state ('sum' for volumes, 'median' for ratios).
+# State values come from the hierarchy rollup wherever it carries the metric (ratios of summed
+# counts, the same figures /api/states serves); the registry rollup covers the rest.
+RANK_METRICS = {
+    'Enrol_Total': 'sum', 'Demo_Total': 'sum', 'Bio_Total': 'sum',
+    'Update_Total': 'sum', 'Grand_Total': 'sum',
+    'UER_Score': 'median', 'Catch_Up_Index': 'median', 'Adult_Entry_Rate': 'median',
+    'CV_Volatility': 'median', 'R21_Child_Bio_Intensity': 'median', 'R22_Adult_Bio_Intensity': 'median',
+    'R1_UER_Lo': 'median', 'R3_Catch_Up_Index_Lo': 'median', 'R7_Adult_ZScore_Lo': 'median',
+}
+# Volume columns derived from their age buckets when a frame doesn't carry them
+DERIVED_TOTALS = {
+    'Demo_Total': ['demo_age_5_17', 'demo_age_17_'],
+    'Bio_Total': ['bio_age_5_17', 'bio_age_17_'],
+}
+TOP_N = 10
+
+def _descending_ranks(values):
+    # Column-wise rank, 1 = highest; NaN ranks last, ties keep row order
+    order = np.argsort(-values, axis=0, kind='stable')
+    ranks = np.empty(values.shape, dtype=np.int32)
+    np.put_along_axis(ranks, order, np.arange(1, len(values) + 1, dtype=np.int32)[:, None], axis=0)
+    return ranks
+
+def _top_positions(values, n):
+    # argpartition picks the n largest per column, then only those n are sorted
+    k = min(n, len(values))
+    if k == 0:
+        return np.empty((0, values.shape[1]), dtype=np.int64)
+    part = np.argpartition(-values, k - 1, axis=0)[:k]
+    top_vals = np.take_along_axis(values, part, axis=0)
+    return np.take_along_axis(part, np.argsort(-top_vals, axis=0, kind='stable'), axis=0)
+
+def _percentile(ranks, counts):
+    # Share of the group this row ranks at or above (100 = top)
+    return 100.0 * (counts - ranks + 1) / np.maximum(counts, 1)
+
+def build_rank_index(df, metrics=None, top_n=TOP_N, rollup=None):
+    print("\n[Analysis] Building Shared Ranking Index...")
+    if 'state' not in df.columns:
+        df = df.reset_index()
+    metrics = [m for m in (metrics or RANK_METRICS)
+               if m in df.columns or set(DERIVED_TOTALS.get(m, [None])) <= set(df.columns)]
+
+    # 1. (districts x metrics) matrix in the frame's own row order
+    columns = []
+    for m in metrics:
+        col = df[m] if m in df.columns else df[DERIVED_TOTALS[m]].sum(axis=1)
+        columns.append(pd.to_numeric(col, errors='coerce').to_numpy(dtype=float))
+    values = np.column_stack(columns) if columns else np.empty((len(df), 0))
+    values = np.where(np.isfinite(values), values, np.nan)
+    codes, states = pd.factorize(df['state'], sort=True)
+
+    # 2. National and within-state district ranks
+    nat_rank = _descending_ranks(values)
+    in_state_rank = np.empty_like(nat_rank)
+    state_sizes = np.bincount(codes, minlength=len(states))
+    starts = np.concatenate([[0], np.cumsum(state_sizes)[:-1]])
+    for j in range(len(metrics)):
+        order = np.lexsort((nat_rank[:, j], codes))    # By state, then national rank
+        in_state_rank[order, j] = np.arange(len(df)) - starts[codes[order]] + 1
+
+    # 3. State-level values: the hierarchy rollup's where it has the metric, else the registry rollup
+    if rollup is None and set(ROLLUP_COUNTS) <= set(df.columns):
+        rollup = build_rollup(df)
+    rolled = pd.DataFrame(index=states) if rollup is None else rollup_level(rollup, 'state').reindex(states)
+    grouped = pd.DataFrame(values, columns=metrics).groupby(codes)
+    state_agg = np.array(['rollup' if m in rolled.columns else RANK_METRICS.get(m, 'median') for m in metrics])
+    state_values = np.column_stack([
+        pd.to_numeric(rolled[m], errors='coerce').to_numpy(dtype=float) if agg == 'rollup' else
+        grouped[m].agg(agg).reindex(range(len(states))).to_numpy()
+        for m, agg in zip(metrics, state_agg)
+    ]) if metrics else np.empty((len(states), 0))
+    state_rank = _descending_ranks(state_values)
+
+    index = {
+        'metrics': np.array(metrics),
+        'state': df['state'].to_numpy().astype(str),
+        'district': df['district'].to_numpy().astype(str),
+        'states': np.asarray(states).astype(str),
+        'values': values,
+        'nat_rank': nat_rank,
+        'nat_pct': _percentile(nat_rank, len(df)),
+        'in_state_rank': in_state_rank,
+        'in_state_pct': _percentile(in_state_rank, state_sizes[codes][:, None]),
+        'in_state_count': state_sizes[codes],
+        'top': _top_positions(values, top_n),
+        'state_values': state_values,
+        'state_agg': state_agg,
+        'state_rank': state_rank,
+        'state_pct': _percentile(state_rank, len(states)),
+        'state_top': _top_positions(state_values, top_n),
+    }
+    print(f"   -> Ranked {len(df)} districts and {len(states)} states on {len(metrics)} metrics")
+    return index
+
+def _metric_col(index, metric):
+    return int(np.flatnonzero(index['metrics'] == metric)[0])
+
+def top_districts(index, metric, n=TOP_N):
+    # Row positions (in the ranked frame's order) of the n highest districts
+    return index['top'][:n, _metric_col(index, metric)]
+
+def top_states(index, metric, n=TOP_N):
+    # State names of the n highest states under the metric's rollup
+    return index['states'][index['state_top'][:n, _metric_col(index, metric)]]
+
+def district_rank(index, pos, metric):
+    j = _metric_col(index, metric)
+    return {
+        'National_Rank': int(index['nat_rank'][pos, j]),
+        'National_Count': len(index['district']),
+        'National_Pct': float(index['nat_pct'][pos, j]),
+        'State_Rank': int(index['in_state_rank'][pos, j]),
+        'State_Count': int(index['in_state_count'][pos]),
+        'State_Pct': float(index['in_state_pct'][pos, j]),
+    }
+
+def save_rank_index(index, filename='aadhaar_rank_index.npz'):
+    np.savez_compressed(filename, **index)
+    print(f"   -> Saved ranking index to '{filename}'")
+    return index
+
+def load_rank_index(filename='aadhaar_rank_index.npz'):
+    if not os.path.exists(filename):
+        return None
+    with np.load(filename) as data:
+        return {key: data[key] for key in data.files}
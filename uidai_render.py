@@ -0,0 +1,136 @@
+import matplotlib
+matplotlib.use('Agg')  # Force a non-interactive backend before anything imports pyplot
+import hashlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+try:
+    import resource  # Process peak RSS (not available on Windows)
+except ImportError:
+    resource = None
+
+# ==========================================
+# PARALLEL HEADLESS CHART RENDERER
+# ==========================================
+# A job is (draw_function, kwargs); kwargs must include 'filename' and only carry
+# the small aggregated input the chart plots, so it pickles cheaply to a worker.
+# That input plus the drawing code is hashed; a chart whose PNG already exists
+# with the same hash in the cache manifest is skipped.
+CACHE_MANIFEST = 'vis_cache_manifest.json'
+CACHE_VERSION = 1  # Bump to force a full redraw (e.g. after a matplotlib upgrade)
+
+def _hash_value(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update(repr((list(value.columns), value.dtypes.astype(str).tolist())).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(repr((value.name, str(value.dtype), value.index.names)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(repr((value.dtype.str, value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            h.update(repr(key).encode())
+            _hash_value(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(f'{type(value).__name__}[{len(value)}]'.encode())
+        for item in value:
+            _hash_value(h, item)
+    else:
+        h.update(repr(value).encode())
+
+def chart_key(job):
+    # Spec = the draw function and its module (theme, rcParams), data = its kwargs
+    func, kwargs = job
+    h = hashlib.sha256(f'v{CACHE_VERSION}:{func.__module__}.{func.__qualname__}'.encode())
+    h.update(inspect.getsource(sys.modules[func.__module__]).encode())
+    _hash_value(h, kwargs)
+    return h.hexdigest()
+
+def _load_manifest(filename):
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(manifest, filename):
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, filename)
+
+def _run_job(job):
+    func, kwargs = job
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(**kwargs)             # Draw functions save and close their own figure
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kwargs['filename'], elapsed, peak
+
+def _pool_context():
+    # Only fork is safe here: spawn/forkserver re-import the caller's __main__ script,
+    # and uidai.py runs its pipeline at import time
+    if 'fork' in mp.get_all_start_methods():
+        return mp.get_context('fork')
+    return None
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(self_kb, child_kb) / 1024
+
+def render_charts(jobs, workers=None, cache=True, manifest_file=CACHE_MANIFEST):
+    jobs = [j for j in jobs if j is not None]
+    print(f"\n[Rendering] Drawing {len(jobs)} charts...")
+    start = time.perf_counter()
+
+    # 1. Skip charts whose input and spec are unchanged since their PNG was written
+    manifest = _load_manifest(manifest_file) if cache else {}
+    keys = {job[1]['filename']: chart_key(job) for job in jobs}
+    cached = [f for f, key in keys.items() if manifest.get(f) == key and os.path.exists(f)]
+    for filename in cached:
+        print(f"   -> Unchanged '{filename}' (cached)")
+    jobs = [job for job in jobs if job[1]['filename'] not in cached]
+
+    context = _pool_context()
+    if workers == 1 or len(jobs) <= 1 or context is None:
+        results = [_run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(_run_job, jobs))
+
+    total = time.perf_counter() - start
+    for filename, elapsed, peak in results:
+        print(f"   -> Generated '{filename}' ({elapsed:.2f}s, peak alloc {peak / 2**20:.1f} MB)")
+
+    # 2. Record hashes only for charts that were actually drawn
+    if cache and results:
+        manifest.update({filename: keys[filename] for filename, _, _ in results})
+        _save_manifest(manifest, manifest_file)
+
+    report = {
+        'charts': len(results),
+        'cached': len(cached),
+        'wall_seconds': total,
+        'chart_seconds': sum(r[1] for r in results),
+        'peak_chart_mb': max((r[2] for r in results), default=0) / 2**20,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+    rss = f", peak RSS {report['peak_rss_mb']:.0f} MB" if report['peak_rss_mb'] is not None else ""
+    print(f"   -> Rendered {report['charts']} charts ({report['cached']} unchanged) in {total:.2f}s wall "
+          f"({report['chart_seconds']:.2f}s of drawing){rss}")
+    return report
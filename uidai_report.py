@@ -0,0 +1,108 @@
+import matplotlib
+matplotlib.use('Agg')  # Headless: the report is only ever written to disk
+import matplotlib.pyplot as plt
+import matplotlib.image as mpimg
+from matplotlib.backends.backend_pdf import PdfPages
+import base64
+import html
+import io
+import os
+import time
+import pandas as pd
+
+# ==========================================
+# CONSOLIDATED HTML / PDF REPORT
+# ==========================================
+# Built from aggregates already in memory (ranked tables, summaries, rendered PNGs);
+# every section is written to the HTML and the PDF in the same pass.
+PDF_TABLE_ROWS = 25
+
+HTML_STYLE = """
+body { font-family: Arial, Helvetica, sans-serif; margin: 40px; color: #1f2937; }
+h1 { color: #3B82F6; margin-bottom: 0; }
+h2 { border-bottom: 2px solid #3B82F6; padding-bottom: 4px; margin-top: 40px; }
+table { border-collapse: collapse; font-size: 13px; margin: 10px 0; }
+th, td { border: 1px solid #d1d5db; padding: 4px 8px; text-align: right; }
+th { background: #eff6ff; }
+img { max-width: 100%; margin: 10px 0; }
+.meta td { text-align: left; }
+.note { opacity: 0.8; }
+"""
+
+def report_section(title, table=None, chart=None, note=None):
+    # table: DataFrame/Series already ranked & trimmed; chart: path of a rendered PNG
+    if isinstance(table, pd.Series):
+        table = table.to_frame()
+    return {'title': title, 'table': table, 'chart': chart, 'note': note}
+
+def _format_table(table):
+    return table.map(lambda v: f"{v:,.3f}" if isinstance(v, float) else v)
+
+def _html_section(section, png):
+    parts = [f"<h2>{html.escape(section['title'])}</h2>"]
+    if section['note']:
+        parts.append(f"<p class='note'>{html.escape(section['note'])}</p>")
+    if section['table'] is not None:
+        parts.append(_format_table(section['table']).to_html())
+    if png is not None:
+        parts.append(f"<img src='data:image/png;base64,{base64.b64encode(png).decode()}' "
+                     f"alt='{html.escape(section['title'])}'>")
+    return "\n".join(parts)
+
+def _pdf_text_page(pdf, title, lines):
+    fig = plt.figure(figsize=(11.69, 8.27))  # A4 landscape
+    fig.text(0.05, 0.92, title, fontsize=20, weight='bold', color='#3B82F6')
+    fig.text(0.05, 0.85, "\n".join(lines), fontsize=11, va='top', family='monospace')
+    pdf.savefig(fig)
+    plt.close(fig)
+
+def _pdf_section(pdf, section, png):
+    if section['table'] is not None:
+        table = _format_table(section['table'].head(PDF_TABLE_ROWS)).reset_index()
+        fig, ax = plt.subplots(figsize=(11.69, 8.27))
+        ax.axis('off')
+        ax.set_title(section['title'], fontsize=14, loc='left')
+        cells = ax.table(cellText=table.astype(str).to_numpy(), colLabels=[str(c) for c in table.columns],
+                         loc='upper center', cellLoc='right')
+        cells.auto_set_font_size(False)
+        cells.set_fontsize(8)
+        cells.auto_set_column_width(range(len(table.columns)))
+        if section['note']:
+            fig.text(0.05, 0.04, section['note'], fontsize=9, style='italic')
+        pdf.savefig(fig)
+        plt.close(fig)
+    if png is not None:
+        fig, ax = plt.subplots(figsize=(11.69, 8.27))
+        ax.imshow(mpimg.imread(io.BytesIO(png), format='png'))
+        ax.axis('off')
+        if section['table'] is None:
+            ax.set_title(section['title'], fontsize=14, loc='left')
+        pdf.savefig(fig)
+        plt.close(fig)
+
+def build_report(sections, metadata, html_file='aadhaar_report.html', pdf_file='aadhaar_report.pdf'):
+    print("\n[Report] Building Consolidated HTML/PDF Report...")
+    start = time.perf_counter()
+    title = "Aadhaar 360 Analysis Report"
+    meta_lines = [f"{k}: {v}" for k, v in metadata.items()]
+
+    body = [f"<h1>{title}</h1>",
+            "<table class='meta'>" + "".join(f"<tr><th>{html.escape(str(k))}</th><td>{html.escape(str(v))}</td></tr>"
+                                             for k, v in metadata.items()) + "</table>"]
+    with PdfPages(pdf_file) as pdf:
+        _pdf_text_page(pdf, title, meta_lines)
+        for section in sections:
+            png = None
+            if section['chart'] and os.path.exists(section['chart']):
+                with open(section['chart'], 'rb') as f:
+                    png = f.read()          # Read once, shared by both outputs
+            body.append(_html_section(section, png))
+            _pdf_section(pdf, section, png)
+        info = pdf.infodict()
+        info['Title'] = title
+
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title>"
+                f"<style>{HTML_STYLE}</style></head><body>\n" + "\n".join(body) + "\n</body></html>")
+    print(f"   -> Saved '{html_file}' and '{pdf_file}' ({len(sections)} sections, "
+          f"{time.perf_counter() - start:.2f}s)")
@@ -0,0 +1,85 @@
+import pandas as pd
+import numpy as np
+import calendar
+import os
+import warnings
+
+# ==========================================
+# SEASONALITY MATRIX (DISTRICT x YEAR x MONTH)
+# ==========================================
+MONTH_NAMES = list(calendar.month_name)[1:]
+
+def seasonal_index(counts, days):
+    # counts: (..., years, 12, measures); days: (years, 12) calendar days covered.
+    # Ratio-to-yearly-average of the daily rate, averaged over years, normalised to mean 1.
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # Entities/years with no data
+        rate = counts / np.where(days > 0, days, np.nan)[..., None]
+        year_mean = np.nanmean(rate, axis=-2, keepdims=True)
+        ratio = np.where(year_mean > 0, rate / year_mean, np.nan)
+        index = np.nanmean(ratio, axis=-3)
+        return index / np.nanmean(index, axis=-2, keepdims=True)
+
+def build_seasonality(cube):
+    print("\n[Action] Building Seasonality Matrix (District x Year x Month)...")
+    dates = cube['dates']
+    values = cube['values']
+    n_dist, _, n_meas = values.shape
+    years = np.arange(dates.year.min(), dates.year.max() + 1)
+
+    # 1. Sum each run of days into its (year, month) slot; the cube's dates are contiguous
+    slot = (dates.year.to_numpy() - years[0]) * 12 + dates.month.to_numpy() - 1
+    starts = np.flatnonzero(np.r_[True, np.diff(slot) != 0])
+    counts = np.zeros((n_dist, len(years) * 12, n_meas))
+    counts[:, slot[starts], :] = np.add.reduceat(values, starts, axis=1)
+    days = np.bincount(slot, minlength=len(years) * 12).reshape(len(years), 12)
+
+    # Months outside the data window are missing, not zero
+    counts = counts.reshape(n_dist, len(years), 12, n_meas)
+    counts[:, days == 0, :] = np.nan
+
+    # 2. Rollups: district -> state -> nation
+    codes, states = pd.factorize(cube['keys']['state'], sort=True)
+    state_counts = np.zeros((len(states),) + counts.shape[1:])
+    np.add.at(state_counts, codes, counts)
+    national_counts = counts.sum(axis=0)
+
+    season = {
+        'state': cube['keys']['state'].to_numpy().astype(str),
+        'district': cube['keys']['district'].to_numpy().astype(str),
+        'states': np.asarray(states).astype(str),
+        'years': years,
+        'measures': np.array(cube['measures']),
+        'days': days,
+        'district_counts': counts,
+        'district_index': seasonal_index(counts, days),
+        'state_counts': state_counts,
+        'state_index': seasonal_index(state_counts, days),
+        'national_counts': national_counts,
+        'national_index': seasonal_index(national_counts, days),
+    }
+    print(f"   -> {n_dist} districts x {len(years)} years x 12 months x {n_meas} measures "
+          f"({int((days > 0).sum())} months observed)")
+    return season
+
+def seasonal_profile(season, measure, level='national', pos=None):
+    # One entity's counts by year and its seasonal index, as a Month x (years + Index) table.
+    # pos is the row position at district/state level (see season['state'] / ['states']).
+    m = int(np.flatnonzero(season['measures'] == measure)[0])
+    counts = season[f'{level}_counts'] if pos is None else season[f'{level}_counts'][pos]
+    index = season[f'{level}_index'] if pos is None else season[f'{level}_index'][pos]
+    profile = pd.DataFrame(counts[:, :, m].T, index=MONTH_NAMES, columns=season['years'])
+    profile = profile.loc[:, season['days'].sum(axis=1) > 0]
+    profile['Index'] = index[:, m]
+    return profile
+
+def save_seasonality(season, filename='aadhaar_seasonality.npz'):
+    np.savez_compressed(filename, **season)
+    print(f"   -> Saved seasonality matrix to '{filename}'")
+    return season
+
+def load_seasonality(filename='aadhaar_seasonality.npz'):
+    if not os.path.exists(filename):
+        return None
+    with np.load(filename) as data:
+        return {key: data[key] for key in data.files}
@@ -0,0 +1,210 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import pyarrow as pa               # Columnar store (optional; falls back to CSV)
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+# ==========================================
+# COLUMNAR DISTRICT STORE (ARROW IPC, MEMORY-MAPPED)
+# ==========================================
+DISTRICT_CSV = 'aadhaar_district_analytics_final_cleaned.csv'
+DISTRICT_ARROW = 'aadhaar_district_analytics_final_cleaned.arrow'
+MONTHLY_CSV = 'aadhaar_monthly_district_trends.csv'
+MONTHLY_ARROW = 'aadhaar_monthly_district_trends.arrow'
+
+# Columns the dashboard actually reads; everything else stays on disk
+APP_COLUMNS = ['state', 'district',
+               'age_0_5', 'age_5_17', 'age_18_greater',
+               'demo_age_5_17', 'demo_age_17_', 'bio_age_5_17', 'bio_age_17_',
+               'Enrol_Total', 'Update_Total', 'Grand_Total',
+               'UER_Score', 'Adult_Entry_Rate', 'Catch_Up_Index', 'CV_Volatility',
+               'Region', 'System_Phase', 'Cluster_ID',
+               'Child_Bio_Intensity', 'Adult_Bio_Intensity', 'Ghost_Proxy', 'Digital_Maturity']
+
+def add_dashboard_features(df):
+    # Per-district scores the dashboard shows, computed once here instead of at app start
+    df['Child_Bio_Intensity'] = df['bio_age_5_17'] / (df['demo_age_5_17'] + 1)
+    df['Adult_Bio_Intensity'] = df['bio_age_17_'] / (df['demo_age_17_'] + 1)
+    # Ghost village proxy: many enrolments, almost no updates
+    df['Ghost_Proxy'] = df['Enrol_Total'] / (df['Update_Total'] + 1)
+    # Digital maturity: demographic (online-capable) share of all updates, 0-100
+    demo = df['demo_age_5_17'] + df['demo_age_17_']
+    updates = demo + df['bio_age_5_17'] + df['bio_age_17_']
+    df['Digital_Maturity'] = np.where(updates > 0, demo / updates.where(updates > 0, 1) * 100, 0.0)
+    return df
+
+def atomic_write(filename, write):
+    # write(path) fills a temp file next to filename, which then replaces it in one rename:
+    # readers see the old file or the new one, never a partial write. Processes that have
+    # the old file memory-mapped keep reading their (unlinked) copy.
+    tmp = f"{filename}.tmp{os.getpid()}"
+    try:
+        write(tmp)
+        os.replace(tmp, filename)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def export_arrow(df, filename=DISTRICT_ARROW):
+    # Uncompressed Arrow IPC, so readers can map the file instead of decoding it
+    if feather is None:
+        print(f"   -> pyarrow not installed; skipped '{filename}'")
+        return df
+    # One record batch, so every column is a single contiguous buffer in the file
+    atomic_write(filename, lambda path: feather.write_feather(df.reset_index(drop=True), path,
+                                                              compression='uncompressed',
+                                                              chunksize=max(len(df), 1)))
+    print(f"   -> Saved columnar copy to '{filename}'")
+    return df
+
+def load_arrow(filename=DISTRICT_ARROW, columns=None):
+    # Only the projected columns are touched. Numeric columns without nulls stay
+    # zero-copy views on the mapped pages, which the OS shares between processes.
+    with pa.memory_map(filename) as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True)
+
+def load_district_table(directory='.', columns=None, prefer='arrow'):
+    # Arrow when available, else the CSV (usecols keeps the same projection)
+    arrow_path = os.path.join(directory, DISTRICT_ARROW)
+    if prefer == 'arrow' and feather is not None and os.path.exists(arrow_path):
+        with pa.memory_map(arrow_path) as source:
+            available = set(pa.ipc.open_file(source).schema.names)
+        return load_arrow(arrow_path, [c for c in columns if c in available] if columns else None)
+    csv_path = os.path.join(directory, DISTRICT_CSV)
+    return pd.read_csv(csv_path, usecols=(lambda c: c in columns) if columns else None)
+
+# ==========================================
+# INDEXED MONTHLY STORE (ONE SLICE PER DISTRICT)
+# ==========================================
+# Rows sorted by state/district/month; the schema metadata carries each district's
+# [start, end) row range, so a lookup maps only that district's slice of the file.
+
+def _district_ranges(monthly):
+    sizes = monthly.groupby(['state', 'district'], sort=False).size()
+    ends = sizes.cumsum()
+    return {key: (int(end - n), int(end)) for key, n, end in zip(sizes.index, sizes, ends)}
+
+def export_monthly_arrow(monthly, filename=MONTHLY_ARROW):
+    if pa is None:
+        print(f"   -> pyarrow not installed; skipped '{filename}'")
+        return monthly
+    monthly = monthly.sort_values(['state', 'district', 'YearMonth'], kind='stable').reset_index(drop=True)
+    ranges = [[s, d, lo, hi] for (s, d), (lo, hi) in _district_ranges(monthly).items()]
+    table = pa.Table.from_pandas(monthly, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           b'district_ranges': json.dumps(ranges).encode()})
+    atomic_write(filename, lambda path: feather.write_feather(table, path, compression='uncompressed',
+                                                              chunksize=max(len(monthly), 1)))
+    print(f"   -> Saved indexed monthly store to '{filename}'")
+    return monthly
+
+def open_monthly_store(directory='.'):
+    # Returns (source, ranges): a memory-mapped Arrow table (nothing decoded yet) or, without
+    # pyarrow / the .arrow file, the sorted CSV frame; ranges maps (state, district) -> (start, end)
+    arrow_path = os.path.join(directory, MONTHLY_ARROW)
+    if pa is not None and os.path.exists(arrow_path):
+        with pa.memory_map(arrow_path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        ranges = {(s, d): (lo, hi) for s, d, lo, hi in json.loads(table.schema.metadata[b'district_ranges'])}
+        return table, ranges
+    csv_path = os.path.join(directory, MONTHLY_CSV)
+    if not os.path.exists(csv_path):
+        return None, {}
+    monthly = pd.read_csv(csv_path).sort_values(['state', 'district', 'YearMonth'], kind='stable')
+    monthly = monthly.reset_index(drop=True)
+    return monthly, _district_ranges(monthly)
+
+def monthly_slice(source, ranges, state, district):
+    span = ranges.get((state, district))
+    if source is None or span is None:
+        return pd.DataFrame()
+    start, end = span
+    if isinstance(source, pd.DataFrame):
+        return source.iloc[start:end].reset_index(drop=True)
+    return source.slice(start, end - start).to_pandas()
+
+def iter_monthly_slices(source, ranges, keys, chunk_rows=50_000):
+    # Monthly rows of many districts as DataFrames of about chunk_rows each, in keys order;
+    # only one chunk is ever decoded at a time
+    spans = [ranges[key] for key in keys if key in ranges]
+    batch, rows = [], 0
+    for i, (start, end) in enumerate(spans):
+        batch.append((start, end))
+        rows += end - start
+        if rows < chunk_rows and i < len(spans) - 1:
+            continue
+        if isinstance(source, pd.DataFrame):
+            yield pd.concat([source.iloc[s:e] for s, e in batch], ignore_index=True)
+        else:
+            yield pa.concat_tables([source.slice(s, e - s) for s, e in batch]).to_pandas()
+        batch, rows = [], 0
+
+# ==========================================
+# VERSIONED ARTIFACTS & HOT RELOAD
+# ==========================================
+RELOAD_CHECK_SECONDS = 1.0
+
+def artifact_version(directory, names):
+    # Fingerprint of the named artifacts from size + mtime (no file contents read)
+    h = hashlib.sha1()
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            st = os.stat(path)
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+class HotReloader:
+    # Serves the latest loaded (version, data) snapshot. A new artifact version is loaded
+    # on a background thread once it has stayed the same for two checks (so a writer that
+    # is still going is not picked up), then swapped in with one assignment. Readers never
+    # wait on a reload; if it fails, the current snapshot stays and the next check retries.
+    def __init__(self, load, version, check_seconds=RELOAD_CHECK_SECONDS):
+        self.load = load
+        self.version = version
+        self.check_seconds = check_seconds
+        current = version()
+        self.snapshot = (current, load())
+        self.seen = current
+        self.checked = time.monotonic()
+        self.lock = threading.Lock()
+        self.loading = False
+
+    def get(self):
+        self.check()
+        return self.snapshot
+
+    def check(self):
+        now = time.monotonic()
+        if now - self.checked < self.check_seconds or not self.lock.acquire(blocking=False):
+            return
+        try:
+            self.checked = now
+            current = self.version()
+            stable, self.seen = current == self.seen, current
+            if stable and current != self.snapshot[0] and not self.loading:
+                self.loading = True
+                threading.Thread(target=self._reload, args=(current,), daemon=True).start()
+        finally:
+            self.lock.release()
+
+    def _reload(self, version):
+        try:
+            self.snapshot = (version, self.load())
+            print(f"   -> Reloaded data version {version}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"   -> Reload of version {version} failed, keeping {self.snapshot[0]}: {e}")
+        finally:
+            self.loading = False
+
@@ -0,0 +1,78 @@
+import pandas as pd
+import numpy as np
+
+# ==========================================
+# RATIO UNCERTAINTY (POISSON BOOTSTRAP OVER THE DAILY CUBE)
+# ==========================================
+ENROL_COLS = ['age_0_5', 'age_5_17', 'age_18_greater']
+DEMO_COLS = ['demo_age_5_17', 'demo_age_17_']
+BIO_COLS = ['bio_age_5_17', 'bio_age_17_']
+
+# Ratio -> (numerator measures, denominator measures). Every ratio is num / (den + 1),
+# the same smoothing calculate_metrics uses, so point estimates match the registry.
+RATIO_SPECS = {
+    'R1_UER': (DEMO_COLS + BIO_COLS, ENROL_COLS),
+    'R2_Bio_Demo_Ratio': (BIO_COLS, DEMO_COLS),
+    'R3_Catch_Up_Index': (['age_5_17'], ['age_0_5']),
+    'R4_Adult_Entry_Rate': (['age_18_greater'], ENROL_COLS),
+    'R5_Child_Share': (['age_0_5'], ENROL_COLS),
+    'R6_Ghost_Proxy': (ENROL_COLS, DEMO_COLS + BIO_COLS),
+    'R21_Child_Bio_Intensity': (['bio_age_5_17'], ['demo_age_5_17']),
+    'R22_Adult_Bio_Intensity': (['bio_age_17_'], ['demo_age_17_']),
+}
+
+def _ratio_weights(measures):
+    # 0/1 selector matrices (measures x ratios) so every ratio is one matmul
+    num_w = np.zeros((len(measures), len(RATIO_SPECS)))
+    den_w = np.zeros((len(measures), len(RATIO_SPECS)))
+    for j, (num_cols, den_cols) in enumerate(RATIO_SPECS.values()):
+        for c in num_cols:
+            num_w[measures.index(c), j] = 1
+        for c in den_cols:
+            den_w[measures.index(c), j] = 1
+    return num_w, den_w
+
+def calculate_ratio_intervals(cube, n_boot=200, alpha=0.05, batch_size=25, seed=42):
+    print(f"\n[Analysis] Bootstrapping Ratio Confidence Intervals ({n_boot} resamples)...")
+    values = cube['values']
+    n_dist, n_days, _ = values.shape
+    num_w, den_w = _ratio_weights(cube['measures'])
+    rng = np.random.default_rng(seed)
+
+    # 1. Point estimates from the full history
+    totals = values.sum(axis=1)
+    point = (totals @ num_w) / (totals @ den_w + 1)
+
+    # 2. Poisson bootstrap: every (district, day) gets a Poisson(1) weight, which
+    #    resamples active days for all districts at once. Batches bound memory.
+    samples = np.empty((n_boot, n_dist, len(RATIO_SPECS)))
+    for start in range(0, n_boot, batch_size):
+        b = min(batch_size, n_boot - start)
+        w = rng.poisson(1.0, size=(n_dist, b, n_days)).astype(values.dtype)
+        boot_totals = np.matmul(w, values)                       # (districts, b, measures)
+        ratios = (boot_totals @ num_w) / (boot_totals @ den_w + 1)
+        samples[start:start + b] = ratios.transpose(1, 0, 2)
+
+    # 3. Percentile interval per district & ratio
+    lo, hi = np.quantile(samples, [alpha / 2, 1 - alpha / 2], axis=0)
+
+    out = {}
+    for j, name in enumerate(RATIO_SPECS):
+        out[name] = point[:, j]
+        out[f'{name}_Lo'] = lo[:, j]
+        out[f'{name}_Hi'] = hi[:, j]
+    index = pd.MultiIndex.from_frame(cube['keys'])
+    print(f"   -> Intervals computed for {n_dist} districts x {len(RATIO_SPECS)} ratios")
+    return pd.DataFrame(out, index=index)
+
+def add_lower_bound_zscore(metrics_df):
+    # Adult Z-score on the conservative side: lower bound against the national mean/std
+    mean_adult = metrics_df['R4_Adult_Entry_Rate'].mean()
+    std_adult = metrics_df['R4_Adult_Entry_Rate'].std()
+    metrics_df['R7_Adult_ZScore_Lo'] = (metrics_df['R4_Adult_Entry_Rate_Lo'] - mean_adult) / (std_adult + 1e-5)
+    return metrics_df
+
+def export_ratio_intervals(intervals, filename='aadhaar_district_ratio_intervals.csv'):
+    intervals.to_csv(filename)
+    print(f"   -> Saved ratio intervals to '{filename}'")
+    return intervals
@@ -0,0 +1,57 @@
+import pandas as pd
+import numpy as np
+
+# ==========================================
+# PER-DISTRICT WEEKDAY LOAD PROFILES
+# ==========================================
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Source dataset -> {raw column: profile column}
+PROFILE_MEASURES = {
+    'Enrolment': {'age_0_5': 'Enrol_0_5', 'age_5_17': 'Enrol_5_17', 'age_18_greater': 'Enrol_18_plus'},
+    'Demographic': {'demo_age_5_17': 'Demo_5_17', 'demo_age_17_': 'Demo_17_plus'},
+    'Biometric': {'bio_age_5_17': 'Bio_5_17', 'bio_age_17_': 'Bio_17_plus'},
+}
+PROFILE_COLS = [c for cat in PROFILE_MEASURES for c in PROFILE_MEASURES[cat].values()]
+
+def build_weekday_profiles(enrol, demo, bio):
+    print("\n[Action] Building Per-District Weekday x Age-Group Load Profiles...")
+    frames = {'Enrolment': enrol, 'Demographic': demo, 'Biometric': bio}
+    frames = {k: f.dropna(subset=['date']) for k, f in frames.items() if not f.empty and 'date' in f.columns}
+
+    keys = pd.concat([f[['state', 'district']] for f in frames.values()], ignore_index=True)
+    keys = keys.drop_duplicates().sort_values(['state', 'district']).reset_index(drop=True)
+    district_index = pd.MultiIndex.from_frame(keys)
+    n_dist = len(keys)
+
+    # 1. One bincount per measure over (district, weekday) slots
+    volumes = np.zeros((n_dist * 7, len(PROFILE_COLS)))
+    for category, df in frames.items():
+        d_pos = district_index.get_indexer(pd.MultiIndex.from_frame(df[['state', 'district']]))
+        slot = d_pos * 7 + df['date'].dt.dayofweek.to_numpy()
+        for raw_col, prof_col in PROFILE_MEASURES[category].items():
+            if raw_col in df.columns:
+                counts = pd.to_numeric(df[raw_col], errors='coerce').fillna(0).to_numpy(dtype=float)
+                volumes[:, PROFILE_COLS.index(prof_col)] = np.bincount(slot, weights=counts, minlength=n_dist * 7)
+
+    # 2. How many of each weekday the data covers, to turn totals into per-day averages
+    all_dates = pd.concat([f['date'] for f in frames.values()])
+    span = pd.date_range(all_dates.min().normalize(), all_dates.max().normalize(), freq='D')
+    weeks = np.bincount(span.dayofweek, minlength=7)
+
+    # 3. Dense table: exactly 7 rows per district, Monday first, sorted by (state, district)
+    profiles = pd.DataFrame(volumes, columns=PROFILE_COLS)
+    profiles.insert(0, 'state', np.repeat(keys['state'].to_numpy(), 7))
+    profiles.insert(1, 'district', np.repeat(keys['district'].to_numpy(), 7))
+    profiles.insert(2, 'DayOfWeek', np.tile(np.arange(7), n_dist))
+    profiles.insert(3, 'Day', np.tile(DAY_NAMES, n_dist))
+    profiles.insert(4, 'Weeks', np.tile(weeks, n_dist))
+    profiles['Total_Volume'] = profiles[PROFILE_COLS].sum(axis=1)
+    profiles['Avg_Daily_Volume'] = profiles['Total_Volume'] / profiles['Weeks'].clip(lower=1)
+    print(f"   -> Profiles built for {n_dist} districts")
+    return profiles
+
+def export_weekday_profiles(profiles, filename='aadhaar_weekday_profiles.csv'):
+    profiles.to_csv(filename, index=False)
+    print(f"   -> Saved weekday profiles to '{filename}'")
+    return profiles